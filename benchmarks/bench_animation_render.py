@@ -0,0 +1,87 @@
+"""
+Render-time benchmark for animate_concept_activation_diagonal.
+
+For several prompt lengths, times the per-frame grid computation (the old
+per-cell loop against the precomputed anti-diagonal frames), the full GIF
+render through FuncAnimation + PillowWriter, and the same GIF written by the
+frame-buffer renderer in fast_render.
+
+    python -m benchmarks.bench_animation_render --lengths 16 64 256
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+from matplotlib.animation import PillowWriter
+
+from llm_reasoning_tracer.visualization import (
+    animate_concept_activation_diagonal, compress_layers, diagonal_reveal_frames
+)
+from llm_reasoning_tracer.fast_render import render_diagonal_animation
+
+
+def loop_frames(compressed_grid):
+    n_rows, n_cols = compressed_grid.shape
+    frames = []
+    for step in range(n_rows + n_cols - 1):
+        partial = np.zeros_like(compressed_grid)
+        for l in range(n_rows):
+            for p in range(n_cols):
+                if (l + p) <= step:
+                    partial[l, p] = compressed_grid[l, p]
+        frames.append(partial)
+    return np.stack(frames)
+
+
+def fake_concept_results(n_layers, n_tokens, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "tokens": ["<bos>"] + [f" t{i}" for i in range(n_tokens)],
+        "intermediate_concepts": [" Texas"],
+        "final_concepts": [],
+        "activation_grid": {" Texas": rng.random((n_layers, n_tokens))}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[16, 64, 128])
+    parser.add_argument("--n-layers", type=int, default=28)
+    parser.add_argument("--skip-render", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'tokens':>7} {'frames':>7} {'loop s':>9} {'vector s':>9} {'render s':>9} {'fast s':>9}")
+    for n_tokens in args.lengths:
+        results = fake_concept_results(args.n_layers, n_tokens)
+        compressed = compress_layers(results["activation_grid"][" Texas"], 2, reduce="max")
+
+        start = time.perf_counter()
+        reference = loop_frames(compressed)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        frames = diagonal_reveal_frames(compressed)
+        vector_time = time.perf_counter() - start
+        assert np.array_equal(reference, frames)
+
+        render_time = fast_time = float("nan")
+        if not args.skip_render:
+            anim = animate_concept_activation_diagonal(results)
+            with tempfile.TemporaryDirectory() as tmp:
+                start = time.perf_counter()
+                anim.save(os.path.join(tmp, "diagonal.gif"), writer=PillowWriter(fps=10), dpi=60)
+                render_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                render_diagonal_animation(results, os.path.join(tmp, "diagonal_fast.gif"), fps=10, dpi=60)
+                fast_time = time.perf_counter() - start
+
+        print(f"{n_tokens:>7} {len(frames):>7} {loop_time:9.4f} {vector_time:9.4f} {render_time:9.2f} {fast_time:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Export-time and size benchmark: HTML trace viewer against GIF animations.
+
+Traces a tiny local model, then writes the same trace as one HTML viewer and
+as the per-concept diagonal GIFs plus the reasoning-flow GIF.
+
+    python -m benchmarks.bench_html_export --n-layers 28
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.animation import PillowWriter
+
+from benchmarks.tiny_model import build_tiny_model, DEFAULT_PROMPT, DEFAULT_CONCEPTS
+from llm_reasoning_tracer.reasoning_analysis import analyze_reasoning_paths
+from llm_reasoning_tracer.visualization import animate_concept_activation_diagonal, save_animation
+from llm_reasoning_tracer.html_export import export_trace_html
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n-layers", type=int, default=28)
+    parser.add_argument("--dpi", type=int, default=100)
+    args = parser.parse_args()
+
+    model = build_tiny_model(n_layers=args.n_layers)
+    path_results = analyze_reasoning_paths(model, DEFAULT_PROMPT, [DEFAULT_CONCEPTS], concept_threshold=0.001)
+    concept_results = path_results["concept_results"]
+    tokens = concept_results["tokens"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        html_path = export_trace_html(os.path.join(tmp, "trace.html"), path_results=path_results)
+        html_time = time.perf_counter() - start
+        html_size = os.path.getsize(html_path)
+
+        start = time.perf_counter()
+        gif_size = 0
+        for concept in DEFAULT_CONCEPTS:
+            path = os.path.join(tmp, f"{concept.strip()}_activation_diagonal.gif")
+            anim = animate_concept_activation_diagonal(concept_results, selected_concepts=[concept])
+            anim.save(path, writer=PillowWriter(fps=10), dpi=args.dpi)
+            gif_size += os.path.getsize(path)
+        flow_path = os.path.join(tmp, "reasoning_flow.gif")
+        save_animation(path_results, tokens[1:], args.n_layers, flow_path, fps=1, dpi=args.dpi)
+        gif_size += os.path.getsize(flow_path)
+        gif_time = time.perf_counter() - start
+
+    print(f"{'output':>8} {'seconds':>10} {'bytes':>10}")
+    print(f"{'gif':>8} {gif_time:10.3f} {gif_size:10d}")
+    print(f"{'html':>8} {html_time:10.4f} {html_size:10d}")
+    print(f"speedup {gif_time / html_time:.0f}x, size ratio {gif_size / html_size:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Import-time check for the visualization layer.
+
+Runs `python -X importtime` on each module in a fresh interpreter, reports
+the cumulative import time, and fails (exit code 1) if importing
+llm_reasoning_tracer.visualization pulls in matplotlib.pyplot, seaborn or
+IPython, or takes longer than --max-ms.
+
+    python -m benchmarks.bench_import_time --max-ms 500
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+MODULES = [
+    "llm_reasoning_tracer.visualization",
+    "llm_reasoning_tracer.sparse_results",
+    "llm_reasoning_tracer.html_export",
+]
+
+HEAVY = ["matplotlib.pyplot", "seaborn", "IPython"]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile(module: str):
+    """Return (cumulative microseconds for module, list of heavy modules loaded)."""
+    code = (f"import sys, {module}\n"
+            f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, env=env, check=True)
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if parts[2] == module:
+            cumulative = int(parts[1])
+    loaded = [name for name in proc.stdout.strip().split(",") if name]
+    return cumulative, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<40} {'cumulative ms':>14}  heavy imports")
+    for module in MODULES:
+        cumulative, loaded = import_profile(module)
+        print(f"{module:<40} {cumulative / 1000:14.1f}  {', '.join(loaded) or '-'}")
+        if loaded or (args.max_ms is not None and cumulative / 1000 > args.max_ms):
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Scaling benchmark for perform_causal_intervention_parallel.
+
+Times the patching sweep on a tiny local model with 1..N worker processes.
+With --check, every run is also compared against the serial
+perform_causal_intervention result (slow: it collects garbage per forward).
+The parent runs torch with --parent-threads intra-op threads before the pool
+starts, so worker start-up is exercised with a multi-threaded torch runtime.
+
+    python -m benchmarks.bench_parallel_intervention --max-workers 8
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import torch
+
+from benchmarks.tiny_model import build_tiny_model, make_prompt, DEFAULT_CONCEPTS
+from llm_reasoning_tracer.causal_intervention import perform_causal_intervention
+from llm_reasoning_tracer.parallel_intervention import perform_causal_intervention_parallel
+
+
+def max_grid_diff(a, b):
+    diff = 0.0
+    for concept, grids in a["intervention_grids"].items():
+        for pos, data in grids.items():
+            other = b["intervention_grids"][concept][pos]["grid"]
+            diff = max(diff, float(np.max(np.abs(data["grid"] - other))))
+    return diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--n-layers", type=int, default=8)
+    parser.add_argument("--d-model", type=int, default=256)
+    parser.add_argument("--n-tokens", type=int, default=12)
+    parser.add_argument("--parent-threads", type=int, default=4)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.parent_threads)
+    model = build_tiny_model(n_layers=args.n_layers, d_model=args.d_model)
+    prompt = make_prompt(args.n_tokens)
+
+    reference = None
+    if args.check:
+        start = time.perf_counter()
+        reference = perform_causal_intervention(model, prompt, DEFAULT_CONCEPTS)
+        print(f"serial perform_causal_intervention: {time.perf_counter() - start:.3f}s")
+
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8} {'max |diff|':>11}")
+    base_time = None
+    n_workers = 1
+    while n_workers <= args.max_workers:
+        start = time.perf_counter()
+        result = perform_causal_intervention_parallel(model, prompt, DEFAULT_CONCEPTS, n_workers=n_workers)
+        elapsed = time.perf_counter() - start
+        base_time = base_time or elapsed
+        diff = f"{max_grid_diff(reference, result):11.2e}" if reference else f"{'-':>11}"
+        print(f"{n_workers:>8} {elapsed:10.3f} {base_time / elapsed:8.2f} {diff}")
+        n_workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Throughput and latency of the local tracing service on a tiny random model.
+
+Starts a TracingService on localhost, sends --requests concurrent extraction
+requests over HTTP (individually and through the streaming /batch endpoint)
+and prints wall time and the service's own latency percentiles, once with
+coalescing disabled (max batch size 1) and once with micro-batching.
+
+    python -m benchmarks.bench_service --requests 64 --max-batch-size 16
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.tiny_model import build_tiny_model, make_prompt, DEFAULT_CONCEPTS
+from llm_reasoning_tracer.service import TracingService
+
+
+async def http(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), head, body
+
+
+def decode_chunked(body: bytes):
+    out = b""
+    while body:
+        size_line, _, body = body.partition(b"\r\n")
+        size = int(size_line, 16)
+        if size == 0:
+            break
+        out += body[:size]
+        body = body[size + 2:]
+    return [json.loads(line) for line in out.splitlines()]
+
+
+async def run(model, args, max_batch_size):
+    service = TracingService(model, max_batch_size=max_batch_size, max_wait_ms=args.max_wait_ms)
+    server_task = asyncio.ensure_future(service.serve(port=args.port))
+    await asyncio.sleep(0.2)
+
+    requests = [{"prompt": make_prompt(8 + i % args.max_tokens), "intermediate_concepts": DEFAULT_CONCEPTS[:2],
+                 "final_concepts": DEFAULT_CONCEPTS[2:]} for i in range(args.requests)]
+
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(http(args.port, "POST", "/extract", r) for r in requests))
+    single_time = time.perf_counter() - start
+    assert all(status == 200 for status, _, _ in responses), responses[0]
+
+    start = time.perf_counter()
+    _, _, body = await http(args.port, "POST", "/batch",
+                            {"requests": [dict(r, kind="extract") for r in requests]})
+    lines = decode_chunked(body)
+    batch_time = time.perf_counter() - start
+    assert len(lines) == len(requests) and all("result" in line for line in lines), lines[:1]
+
+    _, _, stats_body = await http(args.port, "GET", "/stats")
+    stats = json.loads(stats_body)
+    server_task.cancel()
+    try:
+        await server_task
+    except asyncio.CancelledError:
+        pass
+    return single_time, batch_time, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-tokens", type=int, default=24)
+    parser.add_argument("--n-layers", type=int, default=4)
+    parser.add_argument("--d-model", type=int, default=128)
+    parser.add_argument("--port", type=int, default=8779)
+    args = parser.parse_args()
+
+    model = build_tiny_model(n_layers=args.n_layers, d_model=args.d_model, n_ctx=64)
+    print(f"{'max batch':>9} {'/extract s':>11} {'/batch s':>9} {'mean batch':>11} {'p50 ms':>8} {'p99 ms':>8}")
+    for size in (1, args.max_batch_size):
+        single_time, batch_time, stats = asyncio.run(run(model, args, size))
+        latency = stats["latency"]["extract"]
+        print(f"{size:>9} {single_time:11.3f} {batch_time:9.3f} {stats['mean_batch_size']:11.2f} "
+              f"{latency['p50_ms']:8.1f} {latency['p99_ms']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+End-to-end benchmark suite on randomly initialized local HookedTransformers.
+
+For each model size, times and memory-profiles the pipeline stages
+(extract_concept_activations, analyze_reasoning_paths,
+perform_causal_intervention, heatmap plotting and the two animation exports),
+writes the results as JSON and, given a baseline file, flags stages that got
+slower or hungrier than the baseline by more than the tolerance. Runs offline
+on CPU; no model download.
+
+    python -m benchmarks.bench_suite --output bench.json
+    python -m benchmarks.bench_suite --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import torch
+from matplotlib.animation import PillowWriter
+
+from benchmarks.tiny_model import build_tiny_model, make_prompt, DEFAULT_CONCEPTS
+from llm_reasoning_tracer.concept_extraction import extract_concept_activations
+from llm_reasoning_tracer.reasoning_analysis import analyze_reasoning_paths
+from llm_reasoning_tracer.causal_intervention import perform_causal_intervention
+from llm_reasoning_tracer.visualization import (
+    plot_concept_activation_heatmap, animate_concept_activation_diagonal, save_animation
+)
+
+# name -> build_tiny_model kwargs plus the prompt length in tokens
+SIZES = {
+    "tiny": {"n_layers": 2, "d_model": 64, "d_vocab": 256, "n_heads": 4, "seq_len": 12},
+    "small": {"n_layers": 4, "d_model": 128, "d_vocab": 1024, "n_heads": 4, "seq_len": 24},
+    "medium": {"n_layers": 8, "d_model": 256, "d_vocab": 4096, "n_heads": 8, "seq_len": 48},
+    "large": {"n_layers": 12, "d_model": 512, "d_vocab": 16384, "n_heads": 8, "seq_len": 96},
+}
+
+STAGES = ["extract", "analyze", "intervene", "heatmap", "animate_diagonal", "animate_flow"]
+
+PATHS = [[" Dallas", " Texas", " Austin"], [" Dallas", " Austin"]]
+
+
+class PeakRSS:
+    """Samples the process resident set size in a background thread and keeps the peak."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        try:
+            import psutil
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None
+
+    def _rss(self) -> int:
+        if self._process is not None:
+            return self._process.memory_info().rss
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.start = self._rss()
+        self.peak = self.start
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+    @property
+    def delta(self) -> int:
+        return self.peak - self.start
+
+
+def measure(fn, repeat: int):
+    """Run fn repeat times; return wall-clock times and the peak memory of the first run."""
+    times = []
+    python_peak = rss_delta = 0
+    for i in range(repeat):
+        gc.collect()
+        if i == 0:
+            tracemalloc.start()
+            with PeakRSS() as rss, contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - start)
+            python_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            rss_delta = rss.delta
+        else:
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - start)
+    return {
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "runs": len(times),
+        # tracemalloc slows the run it observes, so report the untraced runs when there are any
+        "median_untraced_s": statistics.median(times[1:]) if len(times) > 1 else None,
+        "peak_python_mb": python_peak / 2**20,
+        "peak_rss_delta_mb": rss_delta / 2**20,
+    }
+
+
+def run_size(name: str, spec: dict, stages, repeat: int, n_targets: int, tmp: str) -> dict:
+    spec = dict(spec)
+    seq_len = spec.pop("seq_len")
+    model = build_tiny_model(n_ctx=max(32, seq_len + 8), **spec)
+    prompt = make_prompt(seq_len)
+    n_layers = model.cfg.n_layers
+    concept_results = path_results = None
+
+    def extract():
+        nonlocal concept_results
+        concept_results = extract_concept_activations(model, prompt, DEFAULT_CONCEPTS[:2], DEFAULT_CONCEPTS[2:])
+
+    def analyze():
+        nonlocal path_results
+        path_results = analyze_reasoning_paths(model, prompt, PATHS)
+
+    def intervene():
+        # The full sweep is O(tokens^2 * layers) forwards; a few target
+        # positions keep the stage comparable across sizes.
+        perform_causal_intervention(model, prompt, DEFAULT_CONCEPTS,
+                                    target_positions=list(range(1, 1 + n_targets)))
+
+    def heatmap():
+        fig = plot_concept_activation_heatmap(concept_results)
+        plt.close(fig)
+
+    def animate_diagonal():
+        anim = animate_concept_activation_diagonal(concept_results)
+        anim.save(os.path.join(tmp, f"{name}_diagonal.gif"), writer=PillowWriter(fps=10), dpi=60)
+
+    def animate_flow():
+        save_animation(path_results, concept_results["tokens"], n_layers,
+                       os.path.join(tmp, f"{name}_flow.gif"), dpi=60)
+
+    functions = {"extract": extract, "analyze": analyze, "intervene": intervene,
+                 "heatmap": heatmap, "animate_diagonal": animate_diagonal, "animate_flow": animate_flow}
+
+    # Plots and animations need results, so produce them once even if their stage is not selected.
+    if any(stage in stages for stage in ("heatmap", "animate_diagonal")) and "extract" not in stages:
+        extract()
+    if "animate_flow" in stages and "analyze" not in stages:
+        analyze()
+    if "animate_flow" in stages and concept_results is None:
+        extract()
+
+    out = {"config": dict(spec, seq_len=len(model.to_str_tokens(prompt))), "stages": {}}
+    for stage in STAGES:
+        if stage not in stages:
+            continue
+        out["stages"][stage] = measure(functions[stage], repeat)
+        s = out["stages"][stage]
+        print(f"{name:<8} {stage:<18} {s['median_s']:10.4f} {s['peak_python_mb']:12.1f} {s['peak_rss_delta_mb']:12.1f}",
+              flush=True)
+
+    del model
+    gc.collect()
+    return out
+
+
+def _ratio(old: float, new: float):
+    """new / old, or None when the baseline is not positive (e.g. a 0.0 RSS delta)."""
+    return new / old if old > 0 else None
+
+
+def compare(current: dict, baseline: dict, tolerance: float, memory_tolerance: float,
+            min_seconds: float, min_mb: float):
+    """Return (size, stage, metric, baseline value, current value) for each regression."""
+    regressions = []
+    for size, size_result in current["results"].items():
+        base_size = baseline.get("results", {}).get(size)
+        if base_size is None:
+            continue
+        for stage, result in size_result["stages"].items():
+            base = base_size["stages"].get(stage)
+            if base is None:
+                continue
+            checks = [("median_s", tolerance, min_seconds),
+                      ("peak_python_mb", memory_tolerance, min_mb),
+                      ("peak_rss_delta_mb", memory_tolerance, min_mb)]
+            for metric, rel, floor in checks:
+                old, new = base[metric], result[metric]
+                ratio = _ratio(old, new)
+                # Without a positive baseline only the absolute floor applies.
+                if new - old > floor and (ratio is None or ratio > 1 + rel):
+                    regressions.append((size, stage, metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["tiny", "small"], choices=list(SIZES))
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--intervention-targets", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads (default: torch's)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="JSON from a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed relative memory growth")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="ignore slowdowns smaller than this")
+    parser.add_argument("--min-mb", type=float, default=1.0, help="ignore memory growth smaller than this")
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    if args.threads is not None:
+        torch.set_num_threads(args.threads)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "torch_threads": torch.get_num_threads(),
+            "repeat": args.repeat,
+            "intervention_targets": args.intervention_targets,
+        },
+        "results": {}
+    }
+
+    print(f"{'size':<8} {'stage':<18} {'median s':>10} {'python MB':>12} {'RSS +MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            report["results"][size] = run_size(size, SIZES[size], args.stages, args.repeat,
+                                               args.intervention_targets, tmp)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.memory_tolerance,
+                              args.min_seconds, args.min_mb)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for size, stage, metric, old, new in regressions:
+                ratio = _ratio(old, new)
+                ratio_text = f"{ratio:5.2f}x" if ratio is not None else "  n/a"
+                print(f"  {size:<8} {stage:<18} {metric:<18} {old:10.4f} -> {new:10.4f} ({ratio_text})")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
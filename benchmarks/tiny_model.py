@@ -0,0 +1,97 @@
+import tempfile
+from typing import List, Optional
+
+from tokenizers import Tokenizer, Regex, models, pre_tokenizers, processors
+from transformers import AutoTokenizer, PreTrainedTokenizerFast
+from transformer_lens import HookedTransformer, HookedTransformerConfig
+
+DEFAULT_PROMPT = "Fact: Dallas exists in the state whose capital is"
+DEFAULT_CONCEPTS = [" Dallas", " Texas", " Austin"]
+
+_SPECIAL_TOKENS = ["<|bos|>", "<|eos|>", "[UNK]"]
+_BASE_WORDS = ["Fact:", " Dallas", " Texas", " Austin", " exists", " in", " the", " state",
+               " whose", " capital", " is", " something", "Chicago", " Chicago"]
+
+
+def _build_tokenizer(words: List[str]):
+    vocab = {word: i for i, word in enumerate(words)}
+    tokenizer = Tokenizer(models.WordLevel(vocab=vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Split(Regex(r" ?[^ ]+"), behavior="isolated")
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="<|bos|> $A", special_tokens=[("<|bos|>", vocab["<|bos|>"])]
+    )
+    fast = PreTrainedTokenizerFast(tokenizer_object=tokenizer, bos_token="<|bos|>",
+                                   eos_token="<|eos|>", unk_token="[UNK]",
+                                   pad_token="<|eos|>", add_bos_token=True)
+    # HookedTransformer re-reads the tokenizer's init kwargs, so it has to come
+    # from a (local) pretrained directory rather than straight from memory.
+    with tempfile.TemporaryDirectory() as tmp:
+        fast.save_pretrained(tmp)
+        return AutoTokenizer.from_pretrained(tmp)
+
+
+def build_tiny_model(n_layers: int = 4,
+                     d_model: int = 64,
+                     d_vocab: int = 512,
+                     n_ctx: int = 128,
+                     n_heads: int = 4,
+                     extra_words: Optional[List[str]] = None,
+                     seed: int = 0) -> HookedTransformer:
+    """
+    Build a randomly initialized HookedTransformer with a word-level tokenizer.
+
+    Stands in for Llama-3.2-3B when benchmarking: no download, runs on CPU, and
+    every word in the default prompt and concepts is a single token so the
+    tracing functions exercise exactly the same code paths.
+
+    Parameters:
+    -----------
+    n_layers : int
+        Number of transformer blocks
+    d_model : int
+        Residual stream width
+    d_vocab : int
+        Vocabulary size (padded with filler tokens beyond the known words)
+    n_ctx : int
+        Maximum sequence length
+    n_heads : int
+        Attention heads per block
+    extra_words : Optional[List[str]]
+        Additional single-token words to include in the vocabulary
+    seed : int
+        Seed for weight initialization
+
+    Returns:
+    --------
+    HookedTransformer
+        Model on CPU in eval mode
+    """
+    words = list(_SPECIAL_TOKENS)
+    for word in _BASE_WORDS + (extra_words or []):
+        if word not in words:
+            words.append(word)
+    words += [f" tok{i}" for i in range(max(0, d_vocab - len(words)))]
+
+    cfg = HookedTransformerConfig(
+        n_layers=n_layers,
+        d_model=d_model,
+        d_head=d_model // n_heads,
+        n_heads=n_heads,
+        d_mlp=4 * d_model,
+        n_ctx=n_ctx,
+        d_vocab=len(words),
+        act_fn="gelu",
+        normalization_type="LN",
+        seed=seed,
+        device="cpu"
+    )
+    model = HookedTransformer(cfg, tokenizer=_build_tokenizer(words))
+    model.eval()
+    return model
+
+
+def make_prompt(n_tokens: int) -> str:
+    """Return a prompt of roughly n_tokens tokens built by repeating DEFAULT_PROMPT."""
+    words = DEFAULT_PROMPT.split(" ")
+    out = [words[i % len(words)] for i in range(max(1, n_tokens - 1))]
+    return " ".join(out)
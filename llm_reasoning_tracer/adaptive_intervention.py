@@ -0,0 +1,287 @@
+import numpy as np
+import torch
+from typing import List, Dict, Optional
+from llm_reasoning_tracer.causal_intervention import REPLACEMENTS, SKIP_TOKENS
+from llm_reasoning_tracer.precision import forward_context, cache_dtype, grid_dtype
+from llm_reasoning_tracer.concept_registry import concept_registry
+from llm_reasoning_tracer.instrumentation import traced, span, record, record_forward
+
+# Below this |clean - corrupt| logit difference perform_causal_intervention defines
+# every recovery as 0.0, so those grids are known without patching.
+BASE_EFFECT_CUTOFF = 0.01
+
+
+def _patched_values(model, corrupted_tokens, clean_resid, layer_idx, patch_pos, valid_ids, final_pos, precision):
+    def patching_hook(activations, hook):
+        activations[0, patch_pos, :] = clean_resid[layer_idx][patch_pos, :]
+        return activations
+
+    with span("patch_forward"), torch.inference_mode(), forward_context(model, precision):
+        patched_logits = model.run_with_hooks(
+            corrupted_tokens,
+            fwd_hooks=[(f"blocks.{layer_idx}.hook_resid_post", patching_hook)]
+        )
+        record_forward(model, corrupted_tokens.shape[1])
+    values = patched_logits[0, final_pos, valid_ids].float().cpu().numpy()
+    record(syncs=1)
+    return values
+
+
+def _layer_bins(n_layers: int, layer_bin: int):
+    """Consecutive layer ranges of size layer_bin; each is probed at its last layer."""
+    return [list(range(start, min(start + layer_bin, n_layers))) for start in range(0, n_layers, layer_bin)]
+
+
+@traced(prompt_arg="prompt")
+def perform_causal_intervention_adaptive(model, prompt: str,
+                                         concepts: List[str],
+                                         target_positions: Optional[List[int]] = None,
+                                         patch_positions: Optional[List[int]] = None,
+                                         min_effect: float = 0.01,
+                                         layer_bin: int = 4,
+                                         refine_threshold: float = 0.1,
+                                         max_forwards: Optional[int] = None,
+                                         precision: str = "fp32") -> Dict:
+    """
+    Perform causal interventions with an adaptive, budgeted patching sweep.
+
+    Produces the same result structure as perform_causal_intervention, but
+    evaluates only part of each grid:
+
+    1. Target positions whose largest |clean - corrupt| concept effect is below
+       min_effect are not patched at all.
+    2. Each layer bin is probed by patching its last layer at every patch position.
+    3. Bins where some concept recovers by at least refine_threshold at a patch
+       position are refined by patching their remaining layers there, strongest
+       probes first.
+
+    Target positions are processed in order of decreasing effect, and each
+    patching forward reads every concept at once. Once max_forwards forward
+    passes (clean and corrupted runs included) have been spent, the sweep stops.
+    Grid cells that were not evaluated are NaN, and each grid entry carries an
+    "evaluated" boolean mask of the same shape. Target positions whose corrupted
+    run was cut by the budget are still returned: their grids are all NaN with
+    an all-False mask, their token_importance effect is NaN (sorted last), and
+    they are listed under "unevaluated_positions".
+
+    Parameters:
+    -----------
+    model : HookedTransformer
+        The transformer model to analyze
+    prompt : str
+        The input text prompt
+    concepts : List[str]
+        Concepts to trace
+    target_positions : Optional[List[int]]
+        Token positions to target for intervention
+    patch_positions : Optional[List[int]]
+        Token positions to patch during intervention
+    min_effect : float
+        Minimum |clean - corrupt| logit effect for a target position or concept to be patched
+    layer_bin : int
+        Number of layers per coarse bin; 1 patches every layer (no refinement step)
+    refine_threshold : float
+        Minimum |recovery| of a probe for its bin to be refined
+    max_forwards : Optional[int]
+        Cap on the total number of forward passes (None for no cap)
+    precision : str
+        "fp32", or "bf16" for bfloat16 forwards with the clean cache and grids
+        stored as float16. "int8" is accepted but runs exactly as "bf16": the
+        recoveries read the model's logits, so no W_U projection is quantized
+
+    Returns:
+    --------
+    Dict
+        Intervention results including token importance scores, plus
+        "forwards" (forward passes spent), "budget_exhausted" and
+        "unevaluated_positions" (target positions cut by the budget)
+    """
+
+    tokens = model.to_str_tokens(prompt)
+    n_tokens = len(tokens)
+    n_layers = model.cfg.n_layers
+
+    if target_positions is None:
+        target_positions = list(range(n_tokens - 1))
+
+    if patch_positions is None:
+        patch_positions = list(range(n_tokens))
+
+    results = {
+        "prompt": prompt,
+        "tokens": tokens,
+        "concepts": concepts,
+        "intervention_grids": {c: {} for c in concepts},
+        "token_importance": {c: [] for c in concepts}
+    }
+
+    forwards = 0
+
+    def budget_left():
+        return max_forwards is None or forwards < max_forwards
+
+    concept_ids = concept_registry(model).token_ids(concepts)
+
+    valid = [(concept, concept_id) for concept, concept_id in zip(concepts, concept_ids) if concept_id != -1]
+    valid_ids = [concept_id for _, concept_id in valid]
+
+    final_pos = n_tokens - 1
+
+    with span("clean_forward"), torch.inference_mode(), forward_context(model, precision):
+        clean_logits, clean_cache = model.run_with_cache(
+            prompt, names_filter=lambda name: name.endswith("hook_resid_post")
+        )
+        record_forward(model, n_tokens)
+        clean_resid = [clean_cache[f"blocks.{layer}.hook_resid_post"][0].to(cache_dtype(precision), copy=True)
+                       for layer in range(n_layers)]
+        del clean_cache
+    forwards += 1
+
+    clean_probs = {}
+    for concept, concept_id in zip(concepts, concept_ids):
+        if concept_id != -1:
+            clean_probs[concept] = clean_logits[0, final_pos, concept_id].item()
+            record(syncs=1)
+        else:
+            clean_probs[concept] = 0.0
+    del clean_logits
+
+    base_tokens = model.to_tokens(prompt)
+    corrupted = {}
+    corrupt_probs = {}
+    unevaluated_positions = []
+    budget_exhausted = False
+
+    for pos in target_positions:
+        if tokens[pos].strip().lower() in SKIP_TOKENS:
+            continue
+        replacement = REPLACEMENTS.get(tokens[pos], " something")
+        if not budget_left():
+            # Effect unknown: reported with a NaN effect and an all-NaN grid below.
+            budget_exhausted = True
+            unevaluated_positions.append(pos)
+            for concept in concepts:
+                results["token_importance"][concept].append({
+                    "position": pos,
+                    "token": tokens[pos],
+                    "corrupt_token": replacement,
+                    "effect": float("nan")
+                })
+            continue
+
+        corrupted_tokens = base_tokens.clone()
+        corrupted_tokens[0, pos] = model.to_single_token(replacement)
+        corrupted[pos] = corrupted_tokens
+
+        with span("corrupt_forward", position=pos), torch.inference_mode(), forward_context(model, precision):
+            corrupt_logits = model(corrupted_tokens)
+            record_forward(model, n_tokens)
+        forwards += 1
+
+        corrupt_probs[pos] = {}
+        for concept, concept_id in zip(concepts, concept_ids):
+            if concept_id != -1:
+                corrupt_probs[pos][concept] = corrupt_logits[0, final_pos, concept_id].item()
+                record(syncs=1)
+            else:
+                corrupt_probs[pos][concept] = 0.0
+        del corrupt_logits
+
+        for concept in concepts:
+            effect = clean_probs[concept] - corrupt_probs[pos][concept]
+            results["token_importance"][concept].append({
+                "position": pos,
+                "token": tokens[pos],
+                "corrupt_token": replacement,
+                "effect": effect
+            })
+
+    # Per target position: concepts worth patching, and the grid being filled.
+    patched = {}
+    evaluated = {}
+    active = {}
+    for pos in corrupted:
+        base_effects = np.array([abs(corrupt_probs[pos][concept] - clean_probs[concept]) for concept, _ in valid])
+        active[pos] = (base_effects > BASE_EFFECT_CUTOFF) & (base_effects >= min_effect)
+        patched[pos] = np.full((n_layers, len(patch_positions), len(valid_ids)), np.nan)
+        evaluated[pos] = np.zeros((n_layers, len(patch_positions)), dtype=bool)
+
+    order = sorted((pos for pos in corrupted if active[pos].any()),
+                   key=lambda pos: -max(abs(corrupt_probs[pos][c] - clean_probs[c]) for c, _ in valid))
+    bins = _layer_bins(n_layers, max(1, layer_bin))
+
+    def recovery(pos, values):
+        corrupt = np.array([corrupt_probs[pos][concept] for concept, _ in valid])
+        base = np.array([abs(corrupt_probs[pos][concept] - clean_probs[concept]) for concept, _ in valid])
+        return np.where(active[pos], (values - corrupt) / np.maximum(base, 1e-12), 0.0)
+
+    def evaluate(pos, layer_idx, patch_idx):
+        nonlocal forwards
+        values = _patched_values(model, corrupted[pos], clean_resid, layer_idx, patch_positions[patch_idx],
+                                 valid_ids, final_pos, precision)
+        forwards += 1
+        patched[pos][layer_idx, patch_idx, :] = values
+        evaluated[pos][layer_idx, patch_idx] = True
+        return recovery(pos, values)
+
+    # Coarse pass: probe each bin at its last layer.
+    refine = []
+    with span("coarse_sweep"):
+        for pos in order:
+            for bin_idx, layers in enumerate(bins):
+                for patch_idx in range(len(patch_positions)):
+                    if not budget_left():
+                        budget_exhausted = True
+                        break
+                    strength = np.max(np.abs(evaluate(pos, layers[-1], patch_idx)))
+                    if len(layers) > 1 and strength >= refine_threshold:
+                        refine.append((strength, pos, bin_idx, patch_idx))
+
+    # Refinement: fill the remaining layers of the strongest probes first.
+    with span("refine_sweep"):
+        for _, pos, bin_idx, patch_idx in sorted(refine, key=lambda item: -item[0]):
+            for layer_idx in bins[bin_idx][:-1]:
+                if not budget_left():
+                    budget_exhausted = True
+                    break
+                evaluate(pos, layer_idx, patch_idx)
+
+    for pos in corrupted:
+        for k, (concept, concept_id) in enumerate(valid):
+            base_effect = corrupt_probs[pos][concept] - clean_probs[concept]
+            if abs(base_effect) > BASE_EFFECT_CUTOFF:
+                grid = ((patched[pos][:, :, k] - corrupt_probs[pos][concept]) / abs(base_effect)).astype(grid_dtype(precision))
+                cell_evaluated = evaluated[pos].copy()
+            else:
+                # perform_causal_intervention defines these recoveries as 0.0.
+                grid = np.zeros((n_layers, len(patch_positions)), dtype=grid_dtype(precision))
+                cell_evaluated = np.ones((n_layers, len(patch_positions)), dtype=bool)
+
+            results["intervention_grids"][concept][pos] = {
+                "token": tokens[pos],
+                "grid": grid,
+                "evaluated": cell_evaluated,
+                "patch_positions": patch_positions
+            }
+
+    for pos in unevaluated_positions:
+        for concept, _ in valid:
+            results["intervention_grids"][concept][pos] = {
+                "token": tokens[pos],
+                "grid": np.full((n_layers, len(patch_positions)), np.nan, dtype=grid_dtype(precision)),
+                "evaluated": np.zeros((n_layers, len(patch_positions)), dtype=bool),
+                "patch_positions": patch_positions
+            }
+
+    # Final sorting; positions with an unknown (NaN) effect go last.
+    for concept in concepts:
+        results["token_importance"][concept] = sorted(
+            results["token_importance"][concept],
+            key=lambda x: -1.0 if np.isnan(x["effect"]) else abs(x["effect"]),
+            reverse=True
+        )
+
+    results["forwards"] = forwards
+    results["budget_exhausted"] = budget_exhausted
+    results["unevaluated_positions"] = unevaluated_positions
+    return results
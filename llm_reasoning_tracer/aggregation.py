@@ -0,0 +1,258 @@
+import numpy as np
+from typing import Dict, List, Optional
+
+from llm_reasoning_tracer.sparse_results import densify
+
+
+class _RunningMoments:
+    """Running mean and variance of equal-length vectors (Welford; Chan et al. for merging)."""
+
+    def __init__(self, size: int):
+        self.count = 0
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+
+    def add(self, values: np.ndarray):
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (values - self.mean)
+
+    def merge(self, other: "_RunningMoments"):
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / total
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+
+    def variance(self) -> np.ndarray:
+        return self.m2 / (self.count - 1) if self.count > 1 else np.zeros_like(self.m2)
+
+
+class StreamingAggregator:
+    """
+    Cross-prompt statistics accumulated one result at a time in bounded memory.
+
+    Memory depends on the number of layers, concepts, paths, position bins and
+    tracked corrupted tokens, not on the number of prompts; per-prompt results
+    can be dropped after they are added. Aggregators built in parallel workers
+    combine with merge().
+
+    Parameters:
+    -----------
+    n_position_bins : int
+        Bins for relative token positions (position / (n_tokens - 1)) used by
+        the peak-position histograms and the aligned intervention grids
+    intervention_alignment : str
+        How patch positions of different prompts are aligned in the mean
+        intervention grids: "relative" (bin by relative position) or "end"
+        (the last n_position_bins positions, counted back from the final token)
+    track_tokens : Optional[List[str]]
+        Corrupted tokens (compared stripped) that also get their own mean
+        intervention grids per concept. The per-concept aggregate over all
+        corrupted tokens ("*") is always kept; by default it is the only one,
+        since a grid per distinct corrupted token grows with the corpus.
+    """
+
+    def __init__(self, n_position_bins: int = 20, intervention_alignment: str = "relative",
+                 track_tokens: Optional[List[str]] = None):
+        if intervention_alignment not in ("relative", "end"):
+            raise ValueError(f"intervention_alignment must be 'relative' or 'end', got {intervention_alignment!r}")
+        self.n_position_bins = n_position_bins
+        self.intervention_alignment = intervention_alignment
+        self.track_tokens = frozenset(token.strip() for token in track_tokens or [])
+        self.n_layers = None
+        self.n_prompts = 0
+        self.layer_max_probs = {}
+        self.peak_layers = {}
+        self.peak_positions = {}
+        self.active = {}
+        self.paths = {}
+        self.intervention_sum = {}
+        self.intervention_count = {}
+        self.intervention_prompts = {}
+
+    def _check_layers(self, n_layers: int):
+        if self.n_layers is None:
+            self.n_layers = n_layers
+        elif self.n_layers != n_layers:
+            raise ValueError(f"results have {n_layers} layers, aggregator has {self.n_layers}")
+
+    def _position_bin(self, position: int, n_positions: int) -> int:
+        relative = position / max(n_positions - 1, 1)
+        return min(int(relative * self.n_position_bins), self.n_position_bins - 1)
+
+    def add_concept_results(self, concept_results: Dict):
+        """Add one extract_concept_activations result (dense or compressed)."""
+        self.n_prompts += 1
+        for concept, grid in concept_results["activation_grid"].items():
+            grid = densify(grid).astype(np.float64)
+            n_layers, n_positions = grid.shape
+            self._check_layers(n_layers)
+            if concept not in self.layer_max_probs:
+                self.layer_max_probs[concept] = _RunningMoments(n_layers)
+                self.peak_layers[concept] = np.zeros(n_layers, dtype=np.int64)
+                self.peak_positions[concept] = np.zeros(self.n_position_bins, dtype=np.int64)
+                self.active[concept] = 0
+
+            layer_maxes = concept_results.get("layer_max_probs", {}).get(concept)
+            layer_maxes = grid.max(axis=1) if layer_maxes is None else np.asarray(layer_maxes, dtype=np.float64)
+            self.layer_max_probs[concept].add(layer_maxes)
+
+            if n_positions == 0:
+                continue
+            peak_layer, peak_pos = np.unravel_index(np.argmax(grid), grid.shape)
+            self.peak_layers[concept][peak_layer] += 1
+            self.peak_positions[concept][self._position_bin(peak_pos, n_positions)] += 1
+            if concept_results.get("activations", {}).get(concept):
+                self.active[concept] += 1
+
+    def add_path_results(self, path_results: Dict, include_concepts: bool = True):
+        """
+        Add one analyze_reasoning_paths result.
+
+        Counts, per path, how often it was complete, in order and the best
+        path, and its mean score. With include_concepts, the embedded
+        concept_results are added too.
+        """
+        if include_concepts and "concept_results" in path_results:
+            self.add_concept_results(path_results["concept_results"])
+        best = tuple(path_results["best_path"]) if path_results.get("best_path") else None
+        for entry in path_results["path_scores"]:
+            key = tuple(entry["path"])
+            stats = self.paths.setdefault(key, {"n": 0, "complete": 0, "in_order": 0, "best": 0, "score_sum": 0.0})
+            stats["n"] += 1
+            stats["complete"] += int(entry.get("complete", False))
+            stats["in_order"] += int(bool(entry.get("in_order", False)))
+            stats["best"] += int(key == best)
+            stats["score_sum"] += float(entry["score"])
+
+    def _aligned_columns(self, patch_positions: List[int], n_tokens: int) -> np.ndarray:
+        """Aligned bin of each patch position, or -1 if it falls outside the aligned window."""
+        positions = np.asarray(patch_positions)
+        if self.intervention_alignment == "end":
+            from_end = (n_tokens - 1) - positions
+            return np.where(from_end < self.n_position_bins, self.n_position_bins - 1 - from_end, -1)
+        return np.array([self._position_bin(p, n_tokens) for p in positions], dtype=np.int64)
+
+    def add_intervention_results(self, intervention_results: Dict):
+        """
+        Add one perform_causal_intervention result (any variant, dense or compressed).
+
+        Grids are averaged per concept over all corrupted tokens (under "*")
+        and, for tokens in track_tokens, per (concept, corrupted token). Cells
+        are NaN-aware, so unevaluated cells of adaptive sweeps are left out of
+        the mean rather than counted as 0.
+        """
+        n_tokens = len(intervention_results["tokens"])
+        for concept, grids in intervention_results["intervention_grids"].items():
+            for pos_data in grids.values():
+                grid = densify(pos_data["grid"]).astype(np.float64)
+                self._check_layers(grid.shape[0])
+                columns = self._aligned_columns(pos_data["patch_positions"], n_tokens)
+                keep = columns >= 0
+                values = grid[:, keep]
+                columns = columns[keep]
+                finite = np.isfinite(values)
+
+                token = pos_data["token"].strip()
+                keys = [(concept, "*")] + ([(concept, token)] if token in self.track_tokens else [])
+                for key in keys:
+                    if key not in self.intervention_sum:
+                        self.intervention_sum[key] = np.zeros((self.n_layers, self.n_position_bins))
+                        self.intervention_count[key] = np.zeros((self.n_layers, self.n_position_bins), dtype=np.int64)
+                        self.intervention_prompts[key] = 0
+                    for layer in range(self.n_layers):
+                        np.add.at(self.intervention_sum[key][layer], columns[finite[layer]],
+                                  values[layer][finite[layer]])
+                        np.add.at(self.intervention_count[key][layer], columns[finite[layer]], 1)
+                    self.intervention_prompts[key] += 1
+
+    def merge(self, other: "StreamingAggregator") -> "StreamingAggregator":
+        """Fold another aggregator (e.g. from a parallel worker) into this one; returns self."""
+        if (other.n_position_bins, other.intervention_alignment) != (self.n_position_bins, self.intervention_alignment):
+            raise ValueError("cannot merge aggregators with different position binning")
+        if other.track_tokens != self.track_tokens:
+            raise ValueError("cannot merge aggregators tracking different corrupted tokens")
+        if other.n_layers is not None:
+            self._check_layers(other.n_layers)
+        self.n_prompts += other.n_prompts
+
+        for concept, moments in other.layer_max_probs.items():
+            if concept not in self.layer_max_probs:
+                self.layer_max_probs[concept] = _RunningMoments(len(moments.mean))
+                self.peak_layers[concept] = np.zeros_like(other.peak_layers[concept])
+                self.peak_positions[concept] = np.zeros_like(other.peak_positions[concept])
+                self.active[concept] = 0
+            self.layer_max_probs[concept].merge(moments)
+            self.peak_layers[concept] += other.peak_layers[concept]
+            self.peak_positions[concept] += other.peak_positions[concept]
+            self.active[concept] += other.active[concept]
+
+        for key, stats in other.paths.items():
+            mine = self.paths.setdefault(key, {"n": 0, "complete": 0, "in_order": 0, "best": 0, "score_sum": 0.0})
+            for field, value in stats.items():
+                mine[field] += value
+
+        for key, total in other.intervention_sum.items():
+            if key not in self.intervention_sum:
+                self.intervention_sum[key] = np.zeros_like(total)
+                self.intervention_count[key] = np.zeros_like(other.intervention_count[key])
+                self.intervention_prompts[key] = 0
+            self.intervention_sum[key] += total
+            self.intervention_count[key] += other.intervention_count[key]
+            self.intervention_prompts[key] += other.intervention_prompts[key]
+        return self
+
+    def summary(self) -> Dict:
+        """
+        Current aggregate statistics.
+
+        Returns:
+        --------
+        Dict
+            "concepts": per concept, the mean and std of layer_max_probs per layer,
+            peak layer and relative peak position histograms, and the fraction of
+            prompts where the concept activated;
+            "paths": per path, complete / in-order / best-path rates and mean score;
+            "intervention_grids": per (concept, "*") and (concept, tracked corrupted
+            token), the mean grid (NaN where nothing was observed), per-cell
+            counts and number of grids
+        """
+        summary = {"n_prompts": self.n_prompts, "n_layers": self.n_layers, "concepts": {}, "paths": {},
+                   "intervention_grids": {}}
+        for concept, moments in self.layer_max_probs.items():
+            summary["concepts"][concept] = {
+                "n": moments.count,
+                "layer_max_probs_mean": moments.mean.copy(),
+                "layer_max_probs_std": np.sqrt(moments.variance()),
+                "peak_layer_hist": self.peak_layers[concept].copy(),
+                "peak_position_hist": self.peak_positions[concept].copy(),
+                "active_rate": self.active[concept] / moments.count if moments.count else 0.0
+            }
+        for key, stats in self.paths.items():
+            n = stats["n"]
+            summary["paths"][key] = {
+                "n": n,
+                "complete_rate": stats["complete"] / n,
+                "in_order_rate": stats["in_order"] / n,
+                "best_rate": stats["best"] / n,
+                "mean_score": stats["score_sum"] / n
+            }
+        for key, total in self.intervention_sum.items():
+            count = self.intervention_count[key]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+            summary["intervention_grids"][key] = {
+                "mean_grid": mean,
+                "counts": count.copy(),
+                "n_grids": self.intervention_prompts[key]
+            }
+        return summary
+
+    def path_in_order_rate(self, path: List[str]) -> Optional[float]:
+        """Fraction of prompts where path was found complete and in order (None if never seen)."""
+        stats = self.paths.get(tuple(path))
+        return stats["in_order"] / stats["n"] if stats else None
@@ -2,11 +2,29 @@ import numpy as np
 import torch
 import gc
 from typing import List, Dict, Optional
+from llm_reasoning_tracer.precision import forward_context, cache_dtype, grid_dtype
+from llm_reasoning_tracer.concept_registry import concept_registry
+from llm_reasoning_tracer.instrumentation import traced, span, record, record_forward
 
+REPLACEMENTS = {
+    " Dallas": "Chicago", " plus": " minus", " antagonist": " protagonist"
+}
+
+SKIP_TOKENS = [".", ",", "?", "!", ":", ";", "the", "a", "an", "of", "to", "in", "is", "and"]
+
+
+def _release_memory():
+    with span("gc_collect"):
+        torch.cuda.empty_cache()
+        gc.collect()
+
+
+@traced(prompt_arg="prompt")
 def perform_causal_intervention(model, prompt: str,
                                 concepts: List[str],
                                 target_positions: Optional[List[int]] = None,
-                                patch_positions: Optional[List[int]] = None) -> Dict:
+                                patch_positions: Optional[List[int]] = None,
+                                precision: str = "fp32") -> Dict:
     """
     Perform causal interventions to analyze concept dependencies.
     
@@ -22,6 +40,10 @@ def perform_causal_intervention(model, prompt: str,
         Token positions to target for intervention
     patch_positions : Optional[List[int]]
         Token positions to patch during intervention
+    precision : str
+        "fp32", or "bf16" for bfloat16 forwards with the clean cache and grids
+        stored as float16. "int8" is accepted but runs exactly as "bf16": the
+        recoveries read the model's logits, so no W_U projection is quantized
         
     Returns:
     --------
@@ -47,14 +69,15 @@ def perform_causal_intervention(model, prompt: str,
         "token_importance": {c: [] for c in concepts}
     }
 
-    clean_logits, clean_cache = model.run_with_cache(prompt)
+    with span("clean_forward"), forward_context(model, precision):
+        clean_logits, clean_cache = model.run_with_cache(
+            prompt, names_filter=lambda name: name.endswith("hook_resid_post")
+        )
+        record_forward(model, n_tokens)
+    if precision != "fp32":
+        clean_cache = {name: act.to(cache_dtype(precision)) for name, act in clean_cache.items()}
 
-    concept_ids = []
-    for concept in concepts:
-        try:
-            concept_ids.append(model.to_single_token(concept))
-        except:
-            concept_ids.append(-1)
+    concept_ids = concept_registry(model).token_ids(concepts)
 
     final_pos = n_tokens - 1
 
@@ -62,39 +85,39 @@ def perform_causal_intervention(model, prompt: str,
     for concept, concept_id in zip(concepts, concept_ids):
         if concept_id != -1:
             clean_probs[concept] = clean_logits[0, final_pos, concept_id].item()
+            record(syncs=1)
         else:
             clean_probs[concept] = 0.0
 
-    replacements = {
-        " Dallas": "Chicago", " plus": " minus", " antagonist": " protagonist"
-    }
-
     del clean_logits
-    torch.cuda.empty_cache()
-    gc.collect()
+    _release_memory()
 
     for pos in target_positions:
-        if tokens[pos].strip().lower() in [".", ",", "?", "!", ":", ";", "the", "a", "an", "of", "to", "in", "is", "and"]:
+        if tokens[pos].strip().lower() in SKIP_TOKENS:
             continue
 
         corrupted_tokens = model.to_tokens(prompt).clone()
         token_to_replace = tokens[pos]
-        replacement = replacements.get(token_to_replace, " something")
+        replacement = REPLACEMENTS.get(token_to_replace, " something")
         replacement_id = model.to_single_token(replacement)
         corrupted_tokens[0, pos] = replacement_id
 
-        corrupt_logits, corrupt_cache = model.run_with_cache(corrupted_tokens)
+        with span("corrupt_forward", position=pos), forward_context(model, precision):
+            corrupt_logits, corrupt_cache = model.run_with_cache(
+                corrupted_tokens, names_filter=lambda name: name.endswith("hook_resid_post")
+            )
+            record_forward(model, n_tokens)
 
         corrupt_probs = {}
         for concept, concept_id in zip(concepts, concept_ids):
             if concept_id != -1:
                 corrupt_probs[concept] = corrupt_logits[0, final_pos, concept_id].item()
+                record(syncs=1)
             else:
                 corrupt_probs[concept] = 0.0
 
         del corrupt_logits
-        torch.cuda.empty_cache()
-        gc.collect()
+        _release_memory()
 
         for concept in concepts:
             effect = clean_probs[concept] - corrupt_probs[concept]
@@ -109,7 +132,7 @@ def perform_causal_intervention(model, prompt: str,
             if concept_id == -1:
                 continue
 
-            grid = np.zeros((n_layers, len(patch_positions)))
+            grid = np.zeros((n_layers, len(patch_positions)), dtype=grid_dtype(precision))
             for layer_idx in range(n_layers):
                 for patch_idx, patch_pos in enumerate(patch_positions):
 
@@ -118,19 +141,21 @@ def perform_causal_intervention(model, prompt: str,
                         return activations
 
                     hook_name = f"blocks.{layer_idx}.hook_resid_post"
-                    patched_logits = model.run_with_hooks(
-                        corrupted_tokens,
-                        fwd_hooks=[(hook_name, patching_hook)]
-                    )
+                    with span("patch_forward"), forward_context(model, precision):
+                        patched_logits = model.run_with_hooks(
+                            corrupted_tokens,
+                            fwd_hooks=[(hook_name, patching_hook)]
+                        )
+                        record_forward(model, n_tokens)
 
                     patched_prob = patched_logits[0, final_pos, concept_id].item()
+                    record(syncs=1)
                     base_effect = corrupt_probs[concept] - clean_probs[concept]
                     recovery = (patched_prob - corrupt_probs[concept]) / abs(base_effect) if abs(base_effect) > 0.01 else 0.0
                     grid[layer_idx, patch_idx] = recovery
 
                     del patched_logits
-                    torch.cuda.empty_cache()
-                    gc.collect()
+                    _release_memory()
 
             results["intervention_grids"][concept][pos] = {
                 "token": tokens[pos],
@@ -139,8 +164,7 @@ def perform_causal_intervention(model, prompt: str,
             }
 
         del corrupt_cache
-        torch.cuda.empty_cache()
-        gc.collect()
+        _release_memory()
 
     # Final sorting
     for concept in concepts:
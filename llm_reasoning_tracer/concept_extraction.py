@@ -1,18 +1,26 @@
 import numpy as np
 import torch
 from typing import List, Dict, Optional
+from llm_reasoning_tracer.precision import forward_context, cache_dtype, grid_dtype
+from llm_reasoning_tracer.concept_registry import concept_registry
+from llm_reasoning_tracer.weight_access import CheckpointWeights
+from llm_reasoning_tracer.instrumentation import traced, span, record, record_forward
 
+@traced(prompt_arg="prompt")
 def extract_concept_activations(model, prompt: str,
                                intermediate_concepts: List[str],
                                final_concepts: List[str],
-                               logit_threshold: float = 0.001) -> Dict:
+                               logit_threshold: float = 0.001,
+                               precision: str = "fp32",
+                               residuals: Optional[Dict] = None) -> Dict:
     """
     Extract evidence of concept activations across all layers and positions.
     
     Parameters:
     -----------
-    model : HookedTransformer
-        The transformer model to analyze
+    model : HookedTransformer or CheckpointWeights
+        The transformer model to analyze; with residuals, a CheckpointWeights
+        is enough (projection-only mode, no transformer is instantiated)
     prompt : str
         The input text prompt
     intermediate_concepts : List[str]
@@ -21,6 +29,12 @@ def extract_concept_activations(model, prompt: str,
         Concepts that represent final answers
     logit_threshold : float
         Minimum activation threshold to consider
+    precision : str
+        "fp32", "bf16" (bfloat16 forward and projection, float16 cache and grids)
+        or "int8" (as bf16, with W_U quantized to int8)
+    residuals : Optional[Dict]
+        Cached residual stream from weight_access.load_residuals; when given,
+        no forward pass is run and the tokens are taken from the cache
         
     Returns:
     --------
@@ -28,14 +42,99 @@ def extract_concept_activations(model, prompt: str,
         Detailed information about concept activations
     """
     
+    if residuals is not None:
+        resid_post = residuals["resid_post"]
+        resid = {layer: resid_post[layer].to(cache_dtype(precision)) for layer in range(resid_post.shape[0])}
+        return _concept_activations(model, prompt, residuals["tokens"], resid, intermediate_concepts,
+                                    final_concepts, logit_threshold, precision)
+
     tokens = model.to_str_tokens(prompt)
-    n_tokens = len(tokens)
-    n_layers = model.cfg.n_layers
-    all_concepts = intermediate_concepts + final_concepts
+    model.cfg.use_attn_result = True
+    resid = _resid_post(model, [model.to_tokens(prompt)], precision)[0]
+    return _concept_activations(model, prompt, tokens, resid, intermediate_concepts, final_concepts,
+                                logit_threshold, precision)
+
+
+@traced()
+def extract_concept_activations_batch(model, prompts: List[str],
+                                      intermediate_concepts: List[List[str]],
+                                      final_concepts: List[List[str]],
+                                      logit_threshold: float = 0.001,
+                                      precision: str = "fp32") -> List[Dict]:
+    """
+    Extract concept activations for several prompts with one padded forward pass.
+
+    Prompts are right-padded to a common length. Under causal attention the
+    padding cannot affect earlier positions, so each result matches
+    extract_concept_activations for that prompt (up to float rounding of the
+    batched matmuls).
+
+    Parameters:
+    -----------
+    model : HookedTransformer
+        The transformer model to analyze
+    prompts : List[str]
+        Input text prompts
+    intermediate_concepts : List[List[str]]
+        Intermediate concepts for each prompt
+    final_concepts : List[List[str]]
+        Final concepts for each prompt
+    logit_threshold : float
+        Minimum activation threshold to consider
+    precision : str
+        "fp32", "bf16" or "int8", as in extract_concept_activations
 
+    Returns:
+    --------
+    List[Dict]
+        One extract_concept_activations result per prompt
+    """
     model.cfg.use_attn_result = True
+    resids = _resid_post(model, [model.to_tokens(prompt) for prompt in prompts], precision)
+    outputs = []
+    for prompt, resid, intermediate, final in zip(prompts, resids, intermediate_concepts, final_concepts):
+        with span("concept_activations", prompt=prompt):
+            tokens = model.to_str_tokens(prompt)
+            outputs.append(_concept_activations(model, prompt, tokens, resid, intermediate, final,
+                                                logit_threshold, precision))
+    return outputs
+
 
-    logits, cache = model.run_with_cache(prompt)
+def _resid_post(model, token_rows: List[torch.Tensor], precision: str) -> List[Dict]:
+    """
+    Residual stream after every block for each (1 x length) token row.
+
+    Rows are right-padded into one batch; returns, per row, {layer: (length x d_model)}.
+    """
+    n_layers = model.cfg.n_layers
+    lengths = [row.shape[-1] for row in token_rows]
+    pad_id = getattr(model.tokenizer, "pad_token_id", None) or 0
+    batch = torch.full((len(token_rows), max(lengths)), pad_id, dtype=token_rows[0].dtype,
+                       device=token_rows[0].device)
+    for i, row in enumerate(token_rows):
+        batch[i, :lengths[i]] = row[0]
+
+    with span("forward", batch=len(token_rows)), torch.no_grad(), forward_context(model, precision):
+        logits, cache = model.run_with_cache(
+            batch, names_filter=lambda name: name.endswith("hook_resid_post")
+        )
+        record_forward(model, batch.shape[1], n=len(token_rows))
+    with span("cache_materialize"):
+        resids = [{layer: cache[f"blocks.{layer}.hook_resid_post"][i, :length].to(cache_dtype(precision))
+                   for layer in range(n_layers)}
+                  for i, length in enumerate(lengths)]
+    del logits, cache
+    return resids
+
+
+def _concept_activations(model, prompt: str, tokens: List[str], resid: Dict,
+                         intermediate_concepts: List[str],
+                         final_concepts: List[str],
+                         logit_threshold: float,
+                         precision: str) -> Dict:
+    n_tokens = len(tokens)
+    n_layers = len(resid)
+    all_concepts = intermediate_concepts + final_concepts
 
     results = {
         "prompt": prompt,
@@ -43,38 +142,36 @@ def extract_concept_activations(model, prompt: str,
         "intermediate_concepts": intermediate_concepts,
         "final_concepts": final_concepts,
         "activations": {concept: [] for concept in all_concepts},
-        "activation_grid": {concept: np.zeros((n_layers, n_tokens-1)) for concept in all_concepts} 
+        "activation_grid": {concept: np.zeros((n_layers, n_tokens-1), dtype=grid_dtype(precision)) for concept in all_concepts} 
     }
 
-    concept_token_ids = {}
-    for concept in all_concepts:
-        try:
-            concept_token_ids[concept] = model.to_single_token(concept)
-        except:
-            continue
+    # Only the concept columns of W_U are needed; the registry keeps them gathered across calls.
+    with span("concept_unembed"):
+        weights = model if isinstance(model, CheckpointWeights) else concept_registry(model)
+        found, W_concepts, _ = weights.unembed(all_concepts, precision)
 
+    projection_flops = 2 * (n_tokens - 1) * W_concepts.shape[0] * W_concepts.shape[1]
     for layer in range(n_layers):
-        for pos in range(1, n_tokens):  # start from 1, not 0
-            residual = cache[f"blocks.{layer}.hook_resid_post"][0, pos, :]
-
-            projected_logits = residual @ model.W_U
-
-            for concept in all_concepts:
-                concept_id = concept_token_ids.get(concept)
-                if concept_id is None:
-                    continue
+        with span("project_layer", layer=layer):
+            # start from position 1, not 0
+            projected = (resid[layer][1:, :].to(W_concepts.device, W_concepts.dtype) @ W_concepts).float().cpu().numpy()
+            record(flops=projection_flops, syncs=1)
 
-                concept_score = projected_logits[concept_id].item()
+            for k, concept in enumerate(found):
+                results["activation_grid"][concept][layer, :] = projected[:, k]
 
-                results["activation_grid"][concept][layer, pos-1] = concept_score
+            for concept in found:
+                layer_scores = results["activation_grid"][concept][layer]
+                for pos in range(1, n_tokens):
+                    concept_score = float(layer_scores[pos-1])
 
-                if concept_score > logit_threshold:
-                    results["activations"][concept].append({
-                        "layer": layer,
-                        "position": pos-1,
-                        "probability": concept_score,
-                        "context_token": tokens[pos]
-                    })
+                    if concept_score > logit_threshold:
+                        results["activations"][concept].append({
+                            "layer": layer,
+                            "position": pos-1,
+                            "probability": concept_score,
+                            "context_token": tokens[pos]
+                        })
 
     results["layer_max_probs"] = {}
     for concept in all_concepts:
@@ -0,0 +1,137 @@
+import torch
+import weakref
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from llm_reasoning_tracer.precision import check_precision, columns_at_precision
+
+# One registry per model, dropped together with the model.
+_REGISTRIES = weakref.WeakKeyDictionary()
+
+
+class ConceptRegistry:
+    """
+    Per-model cache of concept token IDs and gathered unembedding columns.
+
+    Token IDs are memoized per tokenizer. Gathered W_U[:, ids] matrices are
+    kept for the most recent concept sets and rebuilt automatically when
+    W_U is replaced, moved to another device or dtype, or modified in place.
+    """
+
+    def __init__(self, model, max_concept_sets: int = 32):
+        self._model = weakref.ref(model)
+        self.max_concept_sets = max_concept_sets
+        self._tokenizer_key = None
+        self._token_ids = {}
+        self._weights_key = None
+        self._unembeds = OrderedDict()
+
+    @property
+    def model(self):
+        model = self._model()
+        if model is None:
+            raise ReferenceError("the model of this ConceptRegistry has been garbage collected")
+        return model
+
+    def token_id(self, concept: str) -> Optional[int]:
+        """Token ID of concept, or None if it does not encode to a single token."""
+        model = self.model
+        tokenizer_key = id(model.tokenizer)
+        if tokenizer_key != self._tokenizer_key:
+            self._tokenizer_key = tokenizer_key
+            self._token_ids.clear()
+        if concept not in self._token_ids:
+            try:
+                self._token_ids[concept] = model.to_single_token(concept)
+            except Exception:
+                self._token_ids[concept] = None
+        return self._token_ids[concept]
+
+    def token_ids(self, concepts: List[str]) -> List[int]:
+        """Token IDs of concepts, with -1 for concepts that are not a single token."""
+        ids = []
+        for concept in concepts:
+            concept_id = self.token_id(concept)
+            ids.append(-1 if concept_id is None else concept_id)
+        return ids
+
+    def _check_weights(self):
+        W_U = self.model.W_U
+        key = (W_U.data_ptr(), W_U.dtype, W_U.device, tuple(W_U.shape), W_U._version)
+        ln_final = getattr(self.model, "ln_final", None)
+        for name in ("w", "b"):
+            param = getattr(ln_final, name, None)
+            if param is not None:
+                key += (param.data_ptr(), param._version)
+        if key != self._weights_key:
+            self._weights_key = key
+            self._unembeds.clear()
+
+    def unembed(self, concepts: List[str],
+                precision: str = "fp32",
+                fold_ln: bool = False) -> Tuple[List[str], torch.Tensor, Optional[torch.Tensor]]:
+        """
+        Contiguous unembedding columns of the single-token concepts.
+
+        Parameters:
+        -----------
+        concepts : List[str]
+            Concepts to project onto; those that are not a single token are dropped
+        precision : str
+            "fp32", "bf16" (bfloat16 columns) or "int8" (per-column int8
+            quantized, dequantized to bfloat16)
+        fold_ln : bool
+            Fold the ln_final scale into the columns and return the ln_final
+            bias projected through them (plus b_U) as a bias, so that
+            normalized_resid @ W + bias equals the final logits of those tokens
+
+        Returns:
+        --------
+        Tuple[List[str], torch.Tensor, Optional[torch.Tensor]]
+            (kept concepts, d_model x len(kept) matrix, bias of len(kept) or None)
+        """
+        check_precision(precision)
+        self._check_weights()
+
+        kept = [concept for concept in concepts if self.token_id(concept) is not None]
+        key = (tuple(kept), precision, fold_ln)
+        entry = self._unembeds.get(key)
+        if entry is not None:
+            self._unembeds.move_to_end(key)
+            return (kept,) + entry
+
+        model = self.model
+        ids = torch.tensor([self.token_id(concept) for concept in kept], dtype=torch.long, device=model.W_U.device)
+        with torch.no_grad():
+            W = model.W_U.index_select(1, ids)
+            bias = None
+            if fold_ln:
+                ln_final = getattr(model, "ln_final", None)
+                scale = getattr(ln_final, "w", None)
+                shift = getattr(ln_final, "b", None)
+                bias = model.b_U.index_select(0, ids).clone()
+                if shift is not None:
+                    bias = bias + shift @ W
+                if scale is not None:
+                    W = scale[:, None] * W
+
+            entry = (columns_at_precision(W, precision).contiguous(), bias)
+
+        self._unembeds[key] = entry
+        if len(self._unembeds) > self.max_concept_sets:
+            self._unembeds.popitem(last=False)
+        return (kept,) + entry
+
+    def clear(self):
+        self._tokenizer_key = None
+        self._token_ids.clear()
+        self._weights_key = None
+        self._unembeds.clear()
+
+
+def concept_registry(model) -> ConceptRegistry:
+    """Return the ConceptRegistry of model, creating it on first use."""
+    registry = _REGISTRIES.get(model)
+    if registry is None:
+        registry = _REGISTRIES[model] = ConceptRegistry(model)
+    return registry
@@ -0,0 +1,327 @@
+import numpy as np
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from llm_reasoning_tracer.visualization import (
+    plt, _diagonal_figure, _reasoning_flow_figure, _reasoning_flow_dark_figure
+)
+from llm_reasoning_tracer.instrumentation import traced, span
+
+
+def _attach_canvas(fig, dpi):
+    fig.set_dpi(dpi)
+    return FigureCanvasAgg(fig)
+
+
+def _grab(canvas) -> np.ndarray:
+    return np.asarray(canvas.buffer_rgba()).copy()
+
+
+def diagonal_frames(concept_results: Dict,
+                    selected_concepts: Optional[List[str]] = None,
+                    compression_factor: int = 2,
+                    figsize=(10, 6),
+                    dpi: int = 100) -> Iterator[np.ndarray]:
+    """
+    Rasterize the frames of animate_concept_activation_diagonal without per-frame redraws.
+
+    The figure is drawn twice, once with the empty heatmap and once fully
+    revealed; every frame is then a per-pixel selection between the two
+    buffers using the anti-diagonal index of the heatmap cell under each pixel.
+
+    Frames are yielded one at a time, so only the two buffers and the frame
+    being encoded are held in memory. The "diagonal_frames" span covers the
+    two draws; per-frame work is counted in the consumer's span.
+
+    Returns:
+    --------
+    Iterator[np.ndarray]
+        RGBA frames of shape (height, width, 4)
+    """
+    with span("diagonal_frames"):
+        fig, ax, im, frames = _diagonal_figure(concept_results, selected_concepts, compression_factor, figsize)
+        canvas = _attach_canvas(fig, dpi)
+
+        canvas.draw()
+        empty = _grab(canvas)
+        im.set_data(frames[-1])
+        canvas.draw()
+        full = _grab(canvas)
+
+        height, width = empty.shape[:2]
+        n_steps = len(frames)
+        n_rows, n_cols = frames.shape[1:]
+        inverse = ax.transData.inverted()
+        px = np.arange(width) + 0.5
+        py = height - (np.arange(height) + 0.5)
+        data_x = inverse.transform(np.column_stack([px, np.full(width, py[0])]))[:, 0]
+        data_y = inverse.transform(np.column_stack([np.full(height, px[0]), py]))[:, 1]
+        cols = np.floor(data_x + 0.5).astype(int)
+        rows = np.floor(data_y + 0.5).astype(int)
+
+        bbox = ax.bbox
+        in_x = (cols >= 0) & (cols < n_cols) & (px >= bbox.x0) & (px <= bbox.x1)
+        in_y = (rows >= 0) & (rows < n_rows) & (py >= bbox.y0) & (py <= bbox.y1)
+        diagonal_index = rows[:, None] + cols[None, :]
+        # Pixels off the heatmap are identical in both buffers, so either choice works.
+        diagonal_index[~(in_y[:, None] & in_x[None, :])] = -1
+
+        plt.close(fig)
+        del frames
+
+    for step in range(n_steps):
+        yield np.where((diagonal_index <= step)[:, :, None], full, empty)
+
+
+def reasoning_flow_frames(path_results: Dict,
+                          tokens: List[str],
+                          model_layers: int,
+                          dark: bool = True,
+                          figsize=(10, 4),
+                          compression_factor: int = 2,
+                          dpi: int = 150) -> Iterator[np.ndarray]:
+    """
+    Rasterize the frames of animate_reasoning_flow(_dark) without per-frame redraws.
+
+    The static figure (axes, grid, title, labels) is drawn once with transparent
+    tick labels and kept as a background buffer. Each frame restores that
+    buffer and draws only the overlays added so far (bubbles, labels, arrows)
+    and the tick labels in their current highlight state.
+
+    Frames are yielded one at a time as they are drawn. The
+    "reasoning_flow_frames" span covers the static draw; per-frame work is
+    counted in the consumer's span.
+
+    Returns:
+    --------
+    Iterator[np.ndarray]
+        RGBA frames of shape (height, width, 4)
+    """
+    with span("reasoning_flow_frames"):
+        if dark:
+            fig, init, animate, n_frames = _reasoning_flow_dark_figure(
+                path_results, tokens, model_layers, figsize, compression_factor
+            )
+        else:
+            fig, animate, n_frames = _reasoning_flow_figure(
+                path_results, tokens, model_layers, figsize, compression_factor
+            )
+            init = None
+        canvas = _attach_canvas(fig, dpi)
+
+        if animate is None:
+            canvas.draw()
+            frame = _grab(canvas)
+            plt.close(fig)
+        else:
+            if init is not None:
+                init()
+            ax = fig.axes[0]
+            tick_labels = ax.get_xticklabels() + ax.get_yticklabels()
+            # Transparent rather than hidden, so axis labels keep their positions.
+            for label in tick_labels:
+                label.set_alpha(0)
+            canvas.draw()
+            background = canvas.copy_from_bbox(fig.bbox)
+            for label in tick_labels:
+                label.set_alpha(None)
+
+            static = set(id(artist) for artist in ax.get_children())
+            renderer = canvas.get_renderer()
+
+    if animate is None:
+        yield frame
+        return
+
+    try:
+        for frame_idx in range(n_frames):
+            animate(frame_idx)
+            overlays = [artist for artist in ax.get_children() if id(artist) not in static]
+            canvas.restore_region(background)
+            for artist in sorted(overlays, key=lambda a: a.get_zorder()):
+                artist.draw(renderer)
+            for label in tick_labels:
+                label.draw(renderer)
+            yield _grab(canvas)
+    finally:
+        plt.close(fig)
+
+
+def _video_format(output_path: str, format: Optional[str]) -> str:
+    """Validated "gif"/"mp4"; chosen by file extension when format is None."""
+    if format is None:
+        return "gif" if output_path.lower().endswith(".gif") else "mp4"
+    if format.lower() not in ("gif", "mp4"):
+        raise ValueError(f"format must be 'gif' or 'mp4', got {format!r}")
+    return format.lower()
+
+
+@traced()
+def encode_frames(frames: Iterable[np.ndarray], output_path: str, fps: int = 10, format: Optional[str] = None):
+    """
+    Encode RGBA frames straight to GIF (Pillow) or MP4 (ffmpeg).
+
+    frames may be any iterable, e.g. the generators of diagonal_frames and
+    reasoning_flow_frames; it is consumed once, frame by frame. format is
+    "gif" or "mp4"; by default it is chosen by file extension.
+    """
+    format = _video_format(output_path, format)
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("no frames to encode")
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if format == "gif":
+        from PIL import Image
+        rest = (Image.fromarray(frame, mode="RGBA") for frame in frames)
+        Image.fromarray(first, mode="RGBA").save(output_path, format="GIF", save_all=True, append_images=rest,
+                                                 duration=int(1000 / fps), loop=0)
+        return
+
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is required to write MP4 output")
+    height, width = first.shape[:2]
+    command = [
+        ffmpeg, "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+        "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-c:v", "libx264", "-pix_fmt", "yuv420p",
+        "-b:v", "1800k", "-f", "mp4", output_path
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE)
+    process.stdin.write(np.ascontiguousarray(first).tobytes())
+    for frame in frames:
+        process.stdin.write(np.ascontiguousarray(frame).tobytes())
+    process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed writing {output_path}")
+
+
+def render_diagonal_animation(concept_results: Dict,
+                              output_path: str,
+                              selected_concepts: Optional[List[str]] = None,
+                              compression_factor: int = 2,
+                              figsize=(10, 6),
+                              fps: int = 10,
+                              dpi: int = 100,
+                              format: Optional[str] = None) -> str:
+    """
+    Write the concept activation diagonal animation to GIF/MP4 via the frame-buffer path.
+
+    Parameters:
+    -----------
+    concept_results : Dict
+        Results from extract_concept_activations
+    output_path : str
+        Destination ending in .gif or .mp4
+    selected_concepts : Optional[List[str]]
+        Concepts to choose from; the first one is animated
+    compression_factor : int
+        Factor by which to compress layers for visualization
+    figsize : tuple
+        Figure size
+    fps : int
+        Frames per second
+    dpi : int
+        Output resolution
+    format : Optional[str]
+        "gif" or "mp4" (default: from the output_path extension)
+
+    Returns:
+    --------
+    str
+        output_path
+    """
+    format = _video_format(output_path, format)
+    frames = diagonal_frames(concept_results, selected_concepts, compression_factor, figsize, dpi)
+    encode_frames(frames, output_path, fps, format)
+    return output_path
+
+
+def render_reasoning_flow(path_results: Dict,
+                          tokens: List[str],
+                          model_layers: int,
+                          output_path: str,
+                          dark: bool = True,
+                          figsize=(10, 4),
+                          compression_factor: int = 2,
+                          fps: int = 10,
+                          dpi: int = 150,
+                          format: Optional[str] = None) -> str:
+    """
+    Write the reasoning flow animation to GIF/MP4 via the frame-buffer path.
+
+    Parameters:
+    -----------
+    path_results : Dict
+        Results from analyze_reasoning_paths
+    tokens : List[str]
+        Tokens from the prompt
+    model_layers : int
+        Number of layers in the model
+    output_path : str
+        Destination ending in .gif or .mp4
+    dark : bool
+        Use the dark theme of animate_reasoning_flow_dark
+    figsize : tuple
+        Figure size
+    compression_factor : int
+        Factor by which to compress layers for visualization
+    fps : int
+        Frames per second
+    dpi : int
+        Output resolution
+    format : Optional[str]
+        "gif" or "mp4" (default: from the output_path extension)
+
+    Returns:
+    --------
+    str
+        output_path
+    """
+    format = _video_format(output_path, format)
+    frames = reasoning_flow_frames(path_results, tokens, model_layers, dark, figsize, compression_factor, dpi)
+    encode_frames(frames, output_path, fps, format)
+    return output_path
+
+
+def _render_job(job: Dict) -> str:
+    job = dict(job)
+    kind = job.pop("kind")
+    if kind == "diagonal":
+        return render_diagonal_animation(**job)
+    if kind == "reasoning_flow":
+        return render_reasoning_flow(**job)
+    raise ValueError(f"Unknown render job kind {kind!r}")
+
+
+def render_many(jobs: List[Dict], n_workers: Optional[int] = None) -> List[str]:
+    """
+    Render many animations in parallel worker processes.
+
+    Parameters:
+    -----------
+    jobs : List[Dict]
+        Keyword arguments for render_diagonal_animation or render_reasoning_flow,
+        plus "kind": "diagonal" or "reasoning_flow"
+    n_workers : Optional[int]
+        Number of processes (defaults to os.cpu_count()); 1 renders in-process
+
+    Returns:
+    --------
+    List[str]
+        Output paths, in the order of jobs
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers == 1:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        return list(pool.map(_render_job, jobs))
@@ -0,0 +1,420 @@
+import numpy as np
+import base64
+import html
+import json
+import os
+import zlib
+from typing import Dict, Optional
+
+from llm_reasoning_tracer.sparse_results import densify
+from llm_reasoning_tracer.instrumentation import traced
+
+
+def _quantize_unsigned(grid: np.ndarray):
+    lo = min(float(np.min(grid)), 0.0)
+    hi = float(np.max(grid))
+    span = hi - lo if hi > lo else 1.0
+    quantized = np.round((grid - lo) / span * 255).astype(np.uint8)
+    return quantized, {"dtype": "u8", "lo": lo, "hi": lo + span}
+
+
+def _quantize_symmetric(grid: np.ndarray, limit: float):
+    limit = limit if limit > 0 else 1.0
+    quantized = np.round(np.clip(grid / limit, -1, 1) * 127).astype(np.int8)
+    return quantized, {"dtype": "i8", "scale": limit / 127}
+
+
+class _BlobWriter:
+    def __init__(self):
+        self.parts = []
+        self.offset = 0
+
+    def add(self, array: np.ndarray, info: Dict) -> Dict:
+        data = np.ascontiguousarray(array).tobytes()
+        self.parts.append(data)
+        entry = dict(info, offset=self.offset, shape=list(array.shape))
+        self.offset += len(data)
+        return entry
+
+    def encode(self) -> str:
+        return base64.b64encode(zlib.compress(b"".join(self.parts), 9)).decode("ascii")
+
+
+def _best_path_peaks(path_results: Dict):
+    best = path_results.get("best_path")
+    details = next((d for d in path_results.get("path_details", []) if d["path"] == best), None)
+    if not best or details is None:
+        return None
+    return [
+        {"concept": peak["concept"], "position": int(peak["position"]), "layer": int(peak["peak_layer"])}
+        for peak in details["concept_peaks"]
+    ]
+
+
+@traced()
+def export_trace_html(output_path: str,
+                      concept_results: Optional[Dict] = None,
+                      path_results: Optional[Dict] = None,
+                      intervention_results: Optional[Dict] = None,
+                      title: Optional[str] = None,
+                      compression_factor: int = 2,
+                      top_k_positions: int = 3) -> str:
+    """
+    Write one self-contained interactive HTML viewer for a trace.
+
+    Grids are quantized (activations to uint8 per concept, recovery grids to
+    int8 on a shared symmetric scale), packed into a single deflate-compressed
+    binary blob and embedded in the page, which renders the heatmaps, the
+    diagonal reveal, the reasoning flow and the intervention maps on canvases
+    in the browser.
+
+    Parameters:
+    -----------
+    output_path : str
+        Destination .html file
+    concept_results : Optional[Dict]
+        Results from extract_concept_activations
+    path_results : Optional[Dict]
+        Results from analyze_reasoning_paths; its concept_results are used
+        when concept_results is not given
+    intervention_results : Optional[Dict]
+        Results from perform_causal_intervention
+    title : Optional[str]
+        Page title (defaults to the prompt)
+    compression_factor : int
+        Factor by which to compress layers for visualization
+    top_k_positions : int
+        Number of top intervention positions per concept to include
+
+    Returns:
+    --------
+    str
+        output_path
+    """
+    if concept_results is None and path_results is not None:
+        concept_results = path_results.get("concept_results")
+
+    blob = _BlobWriter()
+    meta = {"compression_factor": compression_factor}
+
+    prompt = None
+    if concept_results is not None:
+        prompt = concept_results["prompt"]
+        concepts = concept_results["intermediate_concepts"] + concept_results["final_concepts"]
+        meta["tokens"] = concept_results["tokens"][1:]
+        meta["intermediate_concepts"] = concept_results["intermediate_concepts"]
+        meta["activation_grids"] = {}
+        for concept in concepts:
+            grid = densify(concept_results["activation_grid"][concept]).astype(np.float32)
+            quantized, info = _quantize_unsigned(grid)
+            meta["activation_grids"][concept] = blob.add(quantized, info)
+            meta["n_layers"] = int(grid.shape[0])
+
+    if path_results is not None:
+        prompt = prompt or path_results["prompt"]
+        meta["best_path"] = path_results.get("best_path")
+        meta["path_peaks"] = _best_path_peaks(path_results)
+        meta["path_scores"] = [
+            {"path": entry["path"], "score": float(entry["score"]), "in_order": entry.get("in_order")}
+            for entry in path_results.get("path_scores", [])
+        ]
+
+    if intervention_results is not None:
+        prompt = prompt or intervention_results["prompt"]
+        meta["intervention_tokens"] = intervention_results["tokens"]
+        selected = {}
+        limit = 0.0
+        for concept in intervention_results["concepts"]:
+            grids = intervention_results["intervention_grids"].get(concept, {})
+            top = [item["position"] for item in intervention_results["token_importance"].get(concept, [])[:top_k_positions]]
+            selected[concept] = [(pos, grids[pos]) for pos in top if pos in grids]
+            for _, pos_data in selected[concept]:
+                limit = max(limit, float(np.max(np.abs(np.nan_to_num(densify(pos_data["grid"]))))))
+        meta["intervention_grids"] = {}
+        for concept, entries in selected.items():
+            meta["intervention_grids"][concept] = []
+            for pos, pos_data in entries:
+                # Cells an adaptive sweep did not evaluate (NaN) are drawn as 0.
+                quantized, info = _quantize_symmetric(np.nan_to_num(densify(pos_data["grid"])).astype(np.float32), limit)
+                entry = blob.add(quantized, info)
+                entry.update(position=int(pos), token=pos_data["token"],
+                             patch_positions=[int(p) for p in pos_data["patch_positions"]])
+                meta["intervention_grids"][concept].append(entry)
+        meta["intervention_limit"] = limit
+
+    page_title = title or prompt or "Reasoning trace"
+    meta["title"] = page_title
+    page = (_TEMPLATE
+            .replace("__TITLE__", html.escape(page_title))
+            .replace("__META__", json.dumps(meta).replace("</", "<\\/"))
+            .replace("__BLOB__", blob.encode()))
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(page)
+    return output_path
+
+
+_TEMPLATE = r"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+  body { background: #111; color: #eee; font-family: "DejaVu Sans", Arial, sans-serif; margin: 24px; }
+  h1 { font-size: 18px; font-weight: normal; }
+  h2 { font-size: 15px; margin-top: 28px; border-bottom: 1px solid #333; padding-bottom: 4px; }
+  .row { display: flex; flex-wrap: wrap; gap: 12px; }
+  canvas { background: #000; }
+  button, select { background: #222; color: #eee; border: 1px solid #555; padding: 3px 8px; }
+  .caption { font-size: 12px; color: #aaa; }
+</style>
+</head>
+<body>
+<h1>__TITLE__</h1>
+<div id="sections"></div>
+<script id="trace-meta" type="application/json">__META__</script>
+<script id="trace-blob" type="application/octet-stream">__BLOB__</script>
+<script>
+"use strict";
+const ROCKET = ["#03051a", "#251433", "#4c1d4b", "#751f58", "#a11a5b", "#cb1b4f",
+                "#e83f3f", "#f3714d", "#f69c73", "#f7c6a6", "#faebdd"];
+const DIVERGING = ["#ff4d81", "#fc769d", "#f9a0b9", "#f6c9d6", "#f1f2f3",
+                   "#b4dbed", "#77c5e8", "#3aafe2", "#0099dd"];
+
+function hexToRgb(h) { return [1, 3, 5].map(i => parseInt(h.slice(i, i + 2), 16)); }
+function makeLut(stops) {
+  const rgb = stops.map(hexToRgb), lut = [];
+  for (let i = 0; i < 256; i++) {
+    const t = i / 255 * (rgb.length - 1), k = Math.min(Math.floor(t), rgb.length - 2), f = t - k;
+    lut.push(rgb[k].map((c, j) => Math.round(c + (rgb[k + 1][j] - c) * f)));
+  }
+  return lut;
+}
+const LUT_ROCKET = makeLut(ROCKET), LUT_ROCKET_R = makeLut(ROCKET.slice().reverse()), LUT_DIV = makeLut(DIVERGING);
+
+async function loadBlob() {
+  const b64 = document.getElementById("trace-blob").textContent.trim();
+  const bytes = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"));
+  return new Uint8Array(await new Response(stream).arrayBuffer());
+}
+
+function readGrid(buffer, entry) {
+  const [rows, cols] = entry.shape, n = rows * cols, out = new Float32Array(n);
+  if (entry.dtype === "u8") {
+    const q = buffer.subarray(entry.offset, entry.offset + n), span = entry.hi - entry.lo;
+    for (let i = 0; i < n; i++) out[i] = entry.lo + q[i] / 255 * span;
+  } else {
+    const q = new Int8Array(buffer.buffer, buffer.byteOffset + entry.offset, n);
+    for (let i = 0; i < n; i++) out[i] = q[i] * entry.scale;
+  }
+  return {rows, cols, data: out};
+}
+
+function compressLayers(grid, factor, reduce) {
+  const rows = Math.ceil(grid.rows / factor), out = new Float32Array(rows * grid.cols);
+  for (let b = 0; b < rows; b++) {
+    const start = b * factor, end = Math.min(start + factor, grid.rows);
+    for (let c = 0; c < grid.cols; c++) {
+      let acc = reduce === "max" ? -Infinity : 0;
+      for (let r = start; r < end; r++) {
+        const v = grid.data[r * grid.cols + c];
+        acc = reduce === "max" ? Math.max(acc, v) : acc + v;
+      }
+      out[b * grid.cols + c] = reduce === "max" ? acc : acc / (end - start);
+    }
+  }
+  return {rows, cols: grid.cols, data: out};
+}
+
+// scipy.ndimage.gaussian_filter(sigma, mode="reflect", truncate=4)
+function gaussianFilter(grid, sigma) {
+  const radius = Math.round(4 * sigma), weights = [];
+  let total = 0;
+  for (let i = -radius; i <= radius; i++) { const w = Math.exp(-0.5 * i * i / (sigma * sigma)); weights.push(w); total += w; }
+  for (let i = 0; i < weights.length; i++) weights[i] /= total;
+  const reflect = (i, n) => { while (i < 0 || i >= n) i = i < 0 ? -i - 1 : 2 * n - i - 1; return i; };
+  const pass = (src, rows, cols, alongRows) => {
+    const out = new Float32Array(src.length);
+    for (let r = 0; r < rows; r++) for (let c = 0; c < cols; c++) {
+      let acc = 0;
+      for (let k = -radius; k <= radius; k++) {
+        const rr = alongRows ? reflect(r + k, rows) : r, cc = alongRows ? c : reflect(c + k, cols);
+        acc += weights[k + radius] * src[rr * cols + cc];
+      }
+      out[r * cols + c] = acc;
+    }
+    return out;
+  };
+  const data = pass(pass(grid.data, grid.rows, grid.cols, true), grid.rows, grid.cols, false);
+  return {rows: grid.rows, cols: grid.cols, data};
+}
+
+function gridMax(grid) { let m = -Infinity; for (const v of grid.data) m = Math.max(m, v); return m; }
+
+function newCanvas(parent, width, height) {
+  const canvas = document.createElement("canvas");
+  canvas.width = width; canvas.height = height;
+  parent.appendChild(canvas);
+  return canvas.getContext("2d");
+}
+
+function section(title) {
+  const div = document.createElement("div"), h = document.createElement("h2");
+  h.textContent = title; div.appendChild(h);
+  document.getElementById("sections").appendChild(div);
+  return div;
+}
+
+// Draws grid cells bottom-up (row 0 at the bottom) with token labels below and row labels left.
+function drawHeatmap(ctx, grid, opts) {
+  const {x0 = 70, y0 = 10, width, height, lut, vmin, vmax, xLabels = [], yLabels = [],
+         reveal = null, title = null, background = "#000", text = "#ddd"} = opts;
+  const cw = width / grid.cols, ch = height / grid.rows;
+  ctx.fillStyle = background; ctx.fillRect(0, 0, ctx.canvas.width, ctx.canvas.height);
+  const top = y0 + (title ? 18 : 0);
+  if (title) { ctx.fillStyle = text; ctx.font = "12px sans-serif"; ctx.textAlign = "left"; ctx.fillText(title, x0, y0 + 12); }
+  for (let r = 0; r < grid.rows; r++) for (let c = 0; c < grid.cols; c++) {
+    let v = grid.data[r * grid.cols + c];
+    if (reveal !== null && r + c > reveal) v = 0;
+    const t = Math.max(0, Math.min(1, (v - vmin) / (vmax - vmin || 1)));
+    const [R, G, B] = lut[Math.round(t * 255)];
+    ctx.fillStyle = `rgb(${R},${G},${B})`;
+    ctx.fillRect(x0 + c * cw, top + (grid.rows - 1 - r) * ch, Math.ceil(cw), Math.ceil(ch));
+  }
+  ctx.fillStyle = text; ctx.font = "10px sans-serif";
+  ctx.textAlign = "right"; ctx.textBaseline = "middle";
+  yLabels.forEach((label, r) => ctx.fillText(label, x0 - 4, top + (grid.rows - 1 - r + 0.5) * ch));
+  xLabels.forEach((label, c) => {
+    ctx.save(); ctx.translate(x0 + (c + 0.5) * cw, top + grid.rows * ch + 4); ctx.rotate(-Math.PI / 2);
+    ctx.fillText(label, 0, 0); ctx.restore();
+  });
+}
+
+function binLabels(nLayers, factor) {
+  const out = [];
+  for (let i = 0; i < Math.ceil(nLayers / factor); i++) out.push(`${i * factor}-${Math.min((i + 1) * factor - 1, nLayers - 1)}`);
+  return out;
+}
+
+function renderHeatmaps(meta, grids) {
+  const div = section("Concept activation (compressed view)"), factor = meta.compression_factor;
+  const concepts = Object.keys(grids);
+  const binned = concepts.map(c => gaussianFilter(compressLayers(grids[c], factor, "mean"), 0.8));
+  const vmax = Math.max(...concepts.map(c => gridMax(grids[c])));
+  concepts.forEach((concept, i) => {
+    const kind = meta.intermediate_concepts.includes(concept) ? "Intermediate" : "Final";
+    const ctx = newCanvas(div, 900, 300);
+    drawHeatmap(ctx, binned[i], {width: 800, height: 200, lut: LUT_ROCKET, vmin: 0, vmax,
+      xLabels: meta.tokens, yLabels: binLabels(meta.n_layers, factor), title: `${concept} (${kind})`});
+  });
+}
+
+function renderDiagonal(meta, grids) {
+  const div = section("Concept activation flowing through layers"), factor = meta.compression_factor;
+  const controls = document.createElement("div"), select = document.createElement("select");
+  Object.keys(grids).forEach(c => { const o = document.createElement("option"); o.value = o.textContent = c; select.appendChild(o); });
+  controls.appendChild(select); div.appendChild(controls);
+  const ctx = newCanvas(div, 900, 320);
+  let grid, vmax, step = 0, timer = null;
+  const start = () => {
+    grid = gaussianFilter(compressLayers(grids[select.value], factor, "max"), 0.8);
+    vmax = gridMax(grid); step = 0;
+    if (timer) clearInterval(timer);
+    timer = setInterval(() => {
+      drawHeatmap(ctx, grid, {width: 800, height: 220, lut: LUT_ROCKET_R, vmin: 0, vmax, reveal: step,
+        xLabels: meta.tokens, yLabels: binLabels(meta.n_layers, factor), title: `Reasoning Activation: ${select.value}`});
+      step = (step + 1) % (grid.rows + grid.cols - 1);
+    }, 100);
+  };
+  select.onchange = start;
+  start();
+}
+
+function renderFlow(meta) {
+  const div = section(`Reasoning path: ${meta.best_path.join(" → ")}`), factor = meta.compression_factor;
+  const ctx = newCanvas(div, 900, 340), tokens = meta.tokens, nBins = Math.ceil(meta.n_layers / factor);
+  const x0 = 80, y0 = 20, width = 800, height = 240;
+  const px = pos => x0 + (pos + 0.5) / tokens.length * width;
+  const py = bin => y0 + height - (bin + 0.5) / nBins * height;
+  const peaks = meta.path_peaks.map(p => ({concept: p.concept, x: px(p.position), y: py(Math.floor(p.layer / factor)),
+                                           position: p.position, bin: Math.floor(p.layer / factor)}));
+  const nFrames = 2 * peaks.length - 1;
+  let frame = 0;
+  const draw = () => {
+    const shown = Math.min(frame + 1, peaks.length), arrows = Math.min(peaks.length - 1, Math.max(0, frame - peaks.length + 1));
+    ctx.fillStyle = "#000"; ctx.fillRect(0, 0, ctx.canvas.width, ctx.canvas.height);
+    ctx.strokeStyle = "rgba(128,128,128,0.3)"; ctx.setLineDash([4, 4]); ctx.lineWidth = 1;
+    tokens.forEach((_, i) => { ctx.beginPath(); ctx.moveTo(px(i), y0); ctx.lineTo(px(i), y0 + height); ctx.stroke(); });
+    for (let b = 0; b < nBins; b++) { ctx.beginPath(); ctx.moveTo(x0, py(b)); ctx.lineTo(x0 + width, py(b)); ctx.stroke(); }
+    ctx.setLineDash([]);
+    const hiX = new Set(peaks.slice(0, shown).map(p => p.position)), hiY = new Set(peaks.slice(0, shown).map(p => p.bin));
+    ctx.textBaseline = "middle";
+    tokens.forEach((t, i) => {
+      ctx.save(); ctx.translate(px(i), y0 + height + 6); ctx.rotate(-Math.PI / 4);
+      ctx.fillStyle = hiX.has(i) ? "#ff5e57" : "#fff"; ctx.font = hiX.has(i) ? "bold 11px sans-serif" : "10px sans-serif";
+      ctx.textAlign = "right"; ctx.fillText(t, 0, 0); ctx.restore();
+    });
+    binLabels(meta.n_layers, factor).forEach((label, b) => {
+      ctx.fillStyle = hiY.has(b) ? "#00ffe4" : "#fff"; ctx.font = hiY.has(b) ? "bold 11px sans-serif" : "10px sans-serif";
+      ctx.textAlign = "right"; ctx.fillText(label, x0 - 6, py(b));
+    });
+    ctx.strokeStyle = "#00ff99"; ctx.fillStyle = "#00ff99"; ctx.lineWidth = 2;
+    for (let i = 0; i < arrows; i++) {
+      const a = peaks[i], b = peaks[i + 1], mx = (a.x + b.x) / 2, my = (a.y + b.y) / 2;
+      const cx = mx + 0.25 * (b.y - a.y), cy = my - 0.25 * (b.x - a.x);
+      ctx.beginPath(); ctx.moveTo(a.x, a.y); ctx.quadraticCurveTo(cx, cy, b.x, b.y); ctx.stroke();
+      const angle = Math.atan2(b.y - cy, b.x - cx);
+      ctx.beginPath(); ctx.moveTo(b.x, b.y);
+      ctx.lineTo(b.x - 12 * Math.cos(angle - 0.35), b.y - 12 * Math.sin(angle - 0.35));
+      ctx.lineTo(b.x - 12 * Math.cos(angle + 0.35), b.y - 12 * Math.sin(angle + 0.35)); ctx.fill();
+    }
+    peaks.slice(0, shown).forEach(p => {
+      ctx.beginPath(); ctx.arc(p.x, p.y, 9, 0, 2 * Math.PI); ctx.fillStyle = "#0d6efd"; ctx.fill();
+      ctx.strokeStyle = "#fff"; ctx.lineWidth = 1.2; ctx.stroke();
+      ctx.font = "11px sans-serif"; const w = ctx.measureText(p.concept).width + 8;
+      ctx.fillStyle = "rgba(34,34,34,0.9)"; ctx.fillRect(p.x - w / 2, p.y - 32, w, 16);
+      ctx.strokeRect(p.x - w / 2, p.y - 32, w, 16);
+      ctx.fillStyle = "#fff"; ctx.textAlign = "center"; ctx.fillText(p.concept, p.x, p.y - 24);
+    });
+  };
+  setInterval(() => { draw(); frame = (frame + 1) % (nFrames + 2); }, 700);
+  draw();
+}
+
+function renderIntervention(meta, buffer) {
+  const div = section("Causal tracing: layer × position recovery"), lim = meta.intervention_limit || 1;
+  for (const [concept, entries] of Object.entries(meta.intervention_grids)) {
+    const row = document.createElement("div"); row.className = "row"; div.appendChild(row);
+    for (const entry of entries) {
+      const grid = readGrid(buffer, entry), ctx = newCanvas(row, 300, 360);
+      const xLabels = entry.patch_positions.map(p => meta.intervention_tokens[p] ?? "N/A");
+      const yLabels = Array.from({length: grid.rows}, (_, i) => String(i));
+      drawHeatmap(ctx, grid, {x0: 30, width: 260, height: 260, lut: LUT_DIV, vmin: -lim, vmax: lim, xLabels, yLabels,
+        title: `${concept}: corrupting "${entry.token}" (pos ${entry.position})`});
+    }
+  }
+  const caption = document.createElement("p"); caption.className = "caption";
+  caption.textContent = "Red = harmful, Blue = helpful. Values near 1.0 mean strong recovery toward the clean prediction.";
+  div.appendChild(caption);
+}
+
+(async () => {
+  const meta = JSON.parse(document.getElementById("trace-meta").textContent);
+  const buffer = await loadBlob();
+  if (meta.activation_grids) {
+    const grids = {};
+    for (const [concept, entry] of Object.entries(meta.activation_grids)) grids[concept] = readGrid(buffer, entry);
+    renderHeatmaps(meta, grids);
+    renderDiagonal(meta, grids);
+  }
+  if (meta.path_peaks && meta.tokens) renderFlow(meta);
+  if (meta.intervention_grids) renderIntervention(meta, buffer);
+})();
+</script>
+</body>
+</html>
+"""
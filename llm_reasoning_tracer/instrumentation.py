@@ -0,0 +1,338 @@
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Profilers currently collecting; instrumentation is a no-op while this is empty.
+_PROFILERS = []
+# Per-thread stack of open spans, so counters go to every span that encloses them.
+_LOCAL = threading.local()
+
+# Seconds between RSS samples while a span is open.
+RSS_SAMPLE_INTERVAL = 0.005
+
+
+class Span:
+    """One timed region with its counters; counts are inclusive of nested spans."""
+
+    __slots__ = ("name", "attrs", "prompt", "path", "tid", "start_ns", "end_ns",
+                 "forwards", "flops", "syncs", "rss_start", "rss_peak", "rss_growth", "cuda_peak")
+
+    def __init__(self, name: str, attrs: Dict, prompt: Optional[str], path: tuple):
+        self.name = name
+        self.attrs = attrs
+        self.prompt = prompt
+        self.path = path
+        self.tid = threading.get_ident()
+        self.forwards = 0
+        self.flops = 0
+        self.syncs = 0
+        self.rss_growth = 0
+        self.cuda_peak = None
+
+    @property
+    def seconds(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+_PROCESS = []
+
+
+def _current_rss() -> int:
+    """Current resident set size (psutil, else /proc/self/statm; 0 where neither is available)."""
+    if not _PROCESS:
+        try:
+            import psutil
+            _PROCESS.append(psutil.Process())
+        except ImportError:
+            _PROCESS.append(None)
+    if _PROCESS[0] is not None:
+        return _PROCESS[0].memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class _RSSSampler:
+    """
+    Background thread sampling RSS while any span is open, raising each open span's peak.
+
+    ru_maxrss is a process lifetime high-water mark, so its growth reads ~0 for
+    every span after the first peak; sampling gives each span its own peak.
+    The thread exits when the last span closes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = set()
+        self._thread = None
+
+    def open(self, span: Span):
+        with self._lock:
+            self._open.add(span)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-rss-sampler", daemon=True)
+                self._thread.start()
+
+    def close(self, span: Span):
+        with self._lock:
+            self._open.discard(span)
+
+    def _run(self):
+        while True:
+            rss = _current_rss()
+            with self._lock:
+                if not self._open:
+                    self._thread = None
+                    return
+                for open_span in self._open:
+                    if rss > open_span.rss_peak:
+                        open_span.rss_peak = rss
+            time.sleep(RSS_SAMPLE_INTERVAL)
+
+
+_SAMPLER = _RSSSampler()
+
+
+def _cuda():
+    # Only look at CUDA if torch is already loaded and CUDA is in use; never import it here.
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available() and torch.cuda.is_initialized():
+        return torch.cuda
+    return None
+
+
+def _stack() -> List[Span]:
+    stack = getattr(_LOCAL, "stack", None)
+    if stack is None:
+        stack = _LOCAL.stack = []
+    return stack
+
+
+class _SpanContext:
+    __slots__ = ("name", "attrs", "span")
+
+    def __init__(self, name: str, attrs: Dict):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = _stack()
+        prompt = self.attrs.pop("prompt", None)
+        if prompt is None and stack:
+            prompt = stack[-1].prompt
+        path = (stack[-1].path if stack else ()) + (self.name,)
+        span = self.span = Span(self.name, self.attrs, prompt, path)
+        cuda = _cuda()
+        if cuda is not None and not stack:
+            cuda.reset_peak_memory_stats()
+        span.rss_start = span.rss_peak = _current_rss()
+        _SAMPLER.open(span)
+        stack.append(span)
+        span.start_ns = time.perf_counter_ns()
+        return span
+
+    def __exit__(self, *exc):
+        span = self.span
+        span.end_ns = time.perf_counter_ns()
+        _stack().pop()
+        _SAMPLER.close(span)
+        span.rss_growth = max(span.rss_peak, _current_rss()) - span.rss_start
+        cuda = _cuda()
+        if cuda is not None:
+            span.cuda_peak = cuda.max_memory_allocated()
+        for profiler in _PROFILERS:
+            profiler.spans.append(span)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enabled() -> bool:
+    return bool(_PROFILERS)
+
+
+def span(name: str, **attrs):
+    """
+    Context manager timing a named region while a Profiler is active.
+
+    Pass prompt=... on the outermost span of a pipeline call; nested spans
+    inherit it, and Profiler.summary aggregates by it. Returns a shared no-op
+    context when profiling is off.
+    """
+    if not _PROFILERS:
+        return _NULL_SPAN
+    return _SpanContext(name, attrs)
+
+
+def traced(name: Optional[str] = None, prompt_arg: Optional[str] = None):
+    """
+    Decorator wrapping every call of a function in span(name or function name).
+
+    If prompt_arg names a parameter, its value is used as the span's prompt.
+    """
+    def decorator(fn):
+        span_name = name or fn.__name__
+        signature = inspect.signature(fn) if prompt_arg else None
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _PROFILERS:
+                return fn(*args, **kwargs)
+            attrs = {}
+            if signature is not None:
+                attrs["prompt"] = signature.bind_partial(*args, **kwargs).arguments.get(prompt_arg)
+            with _SpanContext(span_name, attrs):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(forwards: int = 0, flops: int = 0, syncs: int = 0):
+    """Add counts to every open span of this thread (no-op when profiling is off)."""
+    if not _PROFILERS:
+        return
+    for open_span in _stack():
+        open_span.forwards += forwards
+        open_span.flops += flops
+        open_span.syncs += syncs
+
+
+def estimate_forward_flops(cfg, n_tokens: int) -> int:
+    """
+    Approximate FLOPs of one forward pass over n_tokens tokens.
+
+    Counts the matmuls of attention projections, attention scores, MLP and
+    unembedding (2 FLOPs per multiply-accumulate); ignores norms, softmax and
+    grouped-query savings.
+    """
+    d_attn = cfg.n_heads * cfg.d_head
+    mlp_matrices = 3 if getattr(cfg, "gated_mlp", False) else 2
+    d_mlp = cfg.d_mlp or 0
+    per_token = cfg.n_layers * (4 * cfg.d_model * d_attn + mlp_matrices * cfg.d_model * d_mlp)
+    per_token += cfg.d_model * cfg.d_vocab
+    per_token += cfg.n_layers * 2 * n_tokens * d_attn
+    return 2 * n_tokens * per_token
+
+
+def record_forward(model, n_tokens: int, n: int = 1):
+    """Count n forward passes of model over n_tokens tokens, with their FLOP estimate."""
+    if not _PROFILERS:
+        return
+    record(forwards=n, flops=n * estimate_forward_flops(model.cfg, n_tokens))
+
+
+class Profiler:
+    """
+    Collects spans from the instrumented pipeline while active.
+
+    Usage:
+        with Profiler() as prof:
+            extract_concept_activations(model, prompt, ...)
+        print(prof.summary_table())
+        prof.save_chrome_trace("trace.json")
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._origin_ns = time.perf_counter_ns()
+
+    def __enter__(self):
+        _PROFILERS.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _PROFILERS.remove(self)
+        return False
+
+    def summary(self) -> List[Dict]:
+        """
+        Aggregate spans per prompt and span path (the names of the enclosing spans).
+
+        Returns one row per group with the number of calls, total wall time,
+        forward passes, estimated GFLOPs, host-device syncs, the largest peak
+        RSS growth within one call (sampled every RSS_SAMPLE_INTERVAL seconds,
+        relative to the RSS when the call started) and, on CUDA, the peak
+        allocated memory.
+        """
+        rows = {}
+        for s in sorted(self.spans, key=lambda s: s.start_ns):
+            key = (s.prompt, s.path)
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = {
+                    "prompt": s.prompt, "name": s.name, "path": "/".join(s.path), "calls": 0,
+                    "total_s": 0.0, "forwards": 0, "gflops": 0.0, "syncs": 0,
+                    "peak_rss_growth_mb": 0.0, "peak_cuda_mb": None
+                }
+            row["calls"] += 1
+            row["total_s"] += s.seconds
+            row["forwards"] += s.forwards
+            row["gflops"] += s.flops / 1e9
+            row["syncs"] += s.syncs
+            row["peak_rss_growth_mb"] = max(row["peak_rss_growth_mb"], s.rss_growth / 2**20)
+            if s.cuda_peak is not None:
+                row["peak_cuda_mb"] = max(row["peak_cuda_mb"] or 0.0, s.cuda_peak / 2**20)
+        return list(rows.values())
+
+    def summary_table(self) -> str:
+        """Human-readable summary, grouped by prompt with nested spans indented."""
+        lines = []
+        header = (f"{'span':<40} {'calls':>7} {'total s':>10} {'forwards':>9} "
+                  f"{'GFLOPs':>10} {'syncs':>8} {'RSS +MB':>9}")
+        by_prompt = {}
+        for row in self.summary():
+            by_prompt.setdefault(row["prompt"], []).append(row)
+        for prompt, rows in by_prompt.items():
+            label = prompt if prompt is not None else "(no prompt)"
+            if len(label) > 70:
+                label = label[:67] + "..."
+            lines += ["", f"prompt: {label}", header]
+            for row in rows:
+                name = "  " * row["path"].count("/") + row["name"]
+                lines.append(f"{name:<40} {row['calls']:>7} {row['total_s']:10.4f} {row['forwards']:>9} "
+                             f"{row['gflops']:10.3f} {row['syncs']:>8} {row['peak_rss_growth_mb']:9.1f}")
+        return "\n".join(lines).lstrip("\n")
+
+    def to_chrome_trace(self) -> Dict:
+        """Spans as Chrome trace events (load in chrome://tracing or Perfetto)."""
+        pid = os.getpid()
+        events = []
+        for s in self.spans:
+            args = dict(s.attrs)
+            args.update(prompt=s.prompt, forwards=s.forwards, flops=s.flops, syncs=s.syncs,
+                        rss_growth_bytes=s.rss_growth)
+            if s.cuda_peak is not None:
+                args["cuda_peak_bytes"] = s.cuda_peak
+            events.append({
+                "name": s.name, "cat": "llm_reasoning_tracer", "ph": "X", "pid": pid, "tid": s.tid,
+                "ts": (s.start_ns - self._origin_ns) / 1e3, "dur": (s.end_ns - s.start_ns) / 1e3,
+                "args": args
+            })
+        events.sort(key=lambda e: e["ts"])
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path: str) -> str:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+        return path
@@ -0,0 +1,52 @@
+import importlib
+import os
+import sys
+
+
+def select_headless_backend():
+    """
+    Use the non-interactive Agg backend when there is no display to draw on.
+
+    Leaves the choice alone if pyplot is already imported, MPLBACKEND is set, or
+    we are inside a Jupyter kernel (which installs its own inline backend).
+    """
+    if "matplotlib.pyplot" in sys.modules or os.environ.get("MPLBACKEND"):
+        return
+    if "ipykernel" in sys.modules:
+        return
+    if sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+        import matplotlib
+        matplotlib.use("Agg")
+
+
+class LazyModule:
+    """
+    Module proxy that imports the real module on first attribute access.
+
+    Lets plotting code keep writing plt.subplots(...) / sns.color_palette(...)
+    while importing the package stays cheap for workers that never plot.
+    """
+
+    def __init__(self, name: str, before_import=None):
+        self.__dict__["_name"] = name
+        self.__dict__["_before_import"] = before_import
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            if self.__dict__["_before_import"] is not None:
+                self.__dict__["_before_import"]()
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
@@ -0,0 +1,262 @@
+import numpy as np
+import torch
+import os
+from typing import List, Dict, Optional
+from llm_reasoning_tracer.causal_intervention import REPLACEMENTS, SKIP_TOKENS
+from llm_reasoning_tracer.precision import forward_context, cache_dtype, grid_dtype
+from llm_reasoning_tracer.concept_registry import concept_registry
+from llm_reasoning_tracer.instrumentation import traced, span, record, record_forward
+
+# State sent once to each worker process. Kept at module level so every task in
+# a worker reads the shared model weights and clean cache without copying.
+_WORKER_STATE = {}
+
+
+def _init_worker(state: Dict, threads_per_worker: int):
+    torch.set_num_threads(threads_per_worker)
+    _WORKER_STATE.clear()
+    _WORKER_STATE.update(state)
+
+
+def _run_units(units):
+    model = _WORKER_STATE["model"]
+    clean_resid = _WORKER_STATE["clean_resid"]
+    corrupted = _WORKER_STATE["corrupted"]
+    valid_ids = _WORKER_STATE["valid_ids"]
+    final_pos = _WORKER_STATE["final_pos"]
+    precision = _WORKER_STATE["precision"]
+
+    out = []
+    with torch.inference_mode(), forward_context(model, precision):
+        for target_pos, layer_idx, patch_idx, patch_pos in units:
+
+            def patching_hook(activations, hook):
+                activations[0, patch_pos, :] = clean_resid[layer_idx][patch_pos, :]
+                return activations
+
+            patched_logits = model.run_with_hooks(
+                corrupted[target_pos],
+                fwd_hooks=[(f"blocks.{layer_idx}.hook_resid_post", patching_hook)]
+            )
+            values = patched_logits[0, final_pos, valid_ids].float().cpu().numpy()
+            out.append((target_pos, layer_idx, patch_idx, values))
+
+            del patched_logits
+    return out
+
+
+@traced(prompt_arg="prompt")
+def perform_causal_intervention_parallel(model, prompt: str,
+                                         concepts: List[str],
+                                         target_positions: Optional[List[int]] = None,
+                                         patch_positions: Optional[List[int]] = None,
+                                         n_workers: Optional[int] = None,
+                                         threads_per_worker: Optional[int] = None,
+                                         chunk_size: int = 8,
+                                         precision: str = "fp32") -> Dict:
+    """
+    Perform causal interventions with the patching sweep sharded across CPU worker processes.
+
+    Produces the same result structure as perform_causal_intervention. Each
+    (target position, layer, patch position) cell is an independent forward pass;
+    cells are distributed over a process pool that shares the model weights with
+    the parent through share_memory() (forkserver or spawn workers) and merged back
+    into intervention_grids by index, so the output does not depend on scheduling.
+
+    Parameters:
+    -----------
+    model : HookedTransformer
+        The transformer model to analyze (on CPU)
+    prompt : str
+        The input text prompt
+    concepts : List[str]
+        Concepts to trace
+    target_positions : Optional[List[int]]
+        Token positions to target for intervention
+    patch_positions : Optional[List[int]]
+        Token positions to patch during intervention
+    n_workers : Optional[int]
+        Number of worker processes (defaults to os.cpu_count()); 1 runs in-process.
+        Workers are started with forkserver (spawn where unavailable), so scripts
+        calling this with more than one worker need an ``if __name__ == "__main__":`` guard
+    threads_per_worker : Optional[int]
+        Intra-op torch threads per worker (defaults to cpu_count // n_workers, at least 1)
+    chunk_size : int
+        Number of patching forwards sent to a worker per task
+    precision : str
+        "fp32", or "bf16" for bfloat16 forwards with the clean cache and grids
+        stored as float16. "int8" is accepted but runs exactly as "bf16": the
+        recoveries read the model's logits, so no W_U projection is quantized
+
+    Returns:
+    --------
+    Dict
+        Intervention results including token importance scores
+    """
+
+    tokens = model.to_str_tokens(prompt)
+    n_tokens = len(tokens)
+    n_layers = model.cfg.n_layers
+
+    if target_positions is None:
+        target_positions = list(range(n_tokens - 1))
+
+    if patch_positions is None:
+        patch_positions = list(range(n_tokens))
+
+    n_cpus = os.cpu_count() or 1
+    if n_workers is None:
+        n_workers = n_cpus
+    n_workers = max(1, n_workers)
+    if threads_per_worker is None:
+        threads_per_worker = max(1, n_cpus // n_workers)
+
+    results = {
+        "prompt": prompt,
+        "tokens": tokens,
+        "concepts": concepts,
+        "intervention_grids": {c: {} for c in concepts},
+        "token_importance": {c: [] for c in concepts}
+    }
+
+    concept_ids = concept_registry(model).token_ids(concepts)
+
+    valid = [(concept, concept_id) for concept, concept_id in zip(concepts, concept_ids) if concept_id != -1]
+    valid_ids = [concept_id for _, concept_id in valid]
+
+    final_pos = n_tokens - 1
+
+    with span("clean_forward"), torch.inference_mode(), forward_context(model, precision):
+        clean_logits, clean_cache = model.run_with_cache(
+            prompt, names_filter=lambda name: name.endswith("hook_resid_post")
+        )
+        record_forward(model, n_tokens)
+        clean_resid = [clean_cache[f"blocks.{layer}.hook_resid_post"][0].to(cache_dtype(precision), copy=True)
+                       for layer in range(n_layers)]
+        del clean_cache
+
+    clean_probs = {}
+    for concept, concept_id in zip(concepts, concept_ids):
+        if concept_id != -1:
+            clean_probs[concept] = clean_logits[0, final_pos, concept_id].item()
+            record(syncs=1)
+        else:
+            clean_probs[concept] = 0.0
+    del clean_logits
+
+    base_tokens = model.to_tokens(prompt)
+    corrupted = {}
+    corrupt_probs = {}
+    active_positions = []
+
+    for pos in target_positions:
+        if tokens[pos].strip().lower() in SKIP_TOKENS:
+            continue
+
+        corrupted_tokens = base_tokens.clone()
+        replacement = REPLACEMENTS.get(tokens[pos], " something")
+        corrupted_tokens[0, pos] = model.to_single_token(replacement)
+        corrupted[pos] = corrupted_tokens
+
+        with span("corrupt_forward", position=pos), torch.inference_mode(), forward_context(model, precision):
+            corrupt_logits = model(corrupted_tokens)
+            record_forward(model, n_tokens)
+
+        corrupt_probs[pos] = {}
+        for concept, concept_id in zip(concepts, concept_ids):
+            if concept_id != -1:
+                corrupt_probs[pos][concept] = corrupt_logits[0, final_pos, concept_id].item()
+                record(syncs=1)
+            else:
+                corrupt_probs[pos][concept] = 0.0
+        del corrupt_logits
+
+        for concept in concepts:
+            effect = clean_probs[concept] - corrupt_probs[pos][concept]
+            results["token_importance"][concept].append({
+                "position": pos,
+                "token": tokens[pos],
+                "corrupt_token": replacement,
+                "effect": effect
+            })
+        active_positions.append(pos)
+
+    patched = {pos: np.zeros((n_layers, len(patch_positions), len(valid_ids))) for pos in active_positions}
+
+    units = [(pos, layer_idx, patch_idx, patch_pos)
+             for pos in active_positions
+             for layer_idx in range(n_layers)
+             for patch_idx, patch_pos in enumerate(patch_positions)]
+    chunks = [units[i:i + chunk_size] for i in range(0, len(units), chunk_size)]
+
+    state = {
+        "model": model,
+        "clean_resid": clean_resid,
+        "corrupted": corrupted,
+        "valid_ids": valid_ids,
+        "final_pos": final_pos,
+        "precision": precision
+    }
+
+    if valid_ids and chunks:
+        with span("patch_sweep", n_workers=n_workers, units=len(units)):
+            if n_workers == 1:
+                prev_threads = torch.get_num_threads()
+                _init_worker(state, threads_per_worker)
+                try:
+                    chunk_results = [_run_units(chunk) for chunk in chunks]
+                finally:
+                    _WORKER_STATE.clear()
+                    torch.set_num_threads(prev_threads)
+            else:
+                # Forking a process that has used torch can deadlock the children on
+                # the inherited OpenMP/MKL thread pool, so workers start from a fresh
+                # process and receive the state by pickling; moving tensors to shared
+                # memory first makes that a handle, not a copy.
+                import torch.multiprocessing as torch_mp
+                start_method = "forkserver" if "forkserver" in torch_mp.get_all_start_methods() else "spawn"
+                ctx = torch_mp.get_context(start_method)
+                if start_method == "forkserver":
+                    # Import this module and the model's (e.g. transformer_lens) once in the
+                    # server rather than in every worker when it unpickles the state.
+                    ctx.set_forkserver_preload([__name__, type(model).__module__])
+                model.share_memory()
+                for tensor in clean_resid:
+                    tensor.share_memory_()
+                for tensor in corrupted.values():
+                    tensor.share_memory_()
+
+                with ctx.Pool(processes=n_workers, initializer=_init_worker,
+                              initargs=(state, threads_per_worker)) as pool:
+                    chunk_results = list(pool.imap_unordered(_run_units, chunks))
+
+            for chunk in chunk_results:
+                for target_pos, layer_idx, patch_idx, values in chunk:
+                    patched[target_pos][layer_idx, patch_idx, :] = values
+            # Worker processes cannot report into this profiler, so count their work here.
+            record_forward(model, n_tokens, n=len(units))
+            record(syncs=len(units))
+
+    for pos in active_positions:
+        for k, (concept, concept_id) in enumerate(valid):
+            base_effect = corrupt_probs[pos][concept] - clean_probs[concept]
+            if abs(base_effect) > 0.01:
+                grid = ((patched[pos][:, :, k] - corrupt_probs[pos][concept]) / abs(base_effect)).astype(grid_dtype(precision))
+            else:
+                grid = np.zeros((n_layers, len(patch_positions)), dtype=grid_dtype(precision))
+
+            results["intervention_grids"][concept][pos] = {
+                "token": tokens[pos],
+                "grid": grid,
+                "patch_positions": patch_positions
+            }
+
+    # Final sorting
+    for concept in concepts:
+        results["token_importance"][concept] = sorted(
+            results["token_importance"][concept],
+            key=lambda x: abs(x["effect"]),
+            reverse=True
+        )
+
+    return results
@@ -0,0 +1,173 @@
+import numpy as np
+import torch
+import contextlib
+from typing import List, Dict, Optional
+
+PRECISIONS = ("fp32", "bf16", "int8")
+
+
+def check_precision(precision: str):
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+
+
+def forward_context(model, precision: str):
+    """
+    Context manager for forward passes at the requested precision.
+
+    "fp32" runs as before; "bf16" and "int8" run the forward under bfloat16 autocast.
+    """
+    check_precision(precision)
+    if precision == "fp32":
+        return contextlib.nullcontext()
+    device_type = torch.device(model.cfg.device).type if model.cfg.device is not None else "cpu"
+    return torch.autocast(device_type, dtype=torch.bfloat16)
+
+
+def cache_dtype(precision: str) -> torch.dtype:
+    """Dtype used to keep cached activations between forward passes."""
+    return torch.float32 if precision == "fp32" else torch.float16
+
+
+def grid_dtype(precision: str):
+    """Dtype of activation and intervention grids in the returned results."""
+    return np.float64 if precision == "fp32" else np.float16
+
+
+def quantize_int8(weight: torch.Tensor):
+    """
+    Symmetric per-column int8 quantization.
+
+    Returns (quantized, scale) with weight ~= quantized * scale.
+    """
+    scale = weight.detach().float().abs().amax(dim=0, keepdim=True).clamp(min=1e-8) / 127.0
+    quantized = torch.round(weight.detach().float() / scale).clamp(-127, 127).to(torch.int8)
+    return quantized, scale
+
+
+def columns_at_precision(W: torch.Tensor, precision: str) -> torch.Tensor:
+    """
+    Cast gathered unembedding columns for projection at the requested precision.
+
+    "int8" quantizes each column to int8 with its own scale and dequantizes
+    to bfloat16, so the result does not depend on which columns are gathered.
+    """
+    check_precision(precision)
+    if precision == "bf16":
+        return W.to(torch.bfloat16)
+    if precision == "int8":
+        quantized, scale = quantize_int8(W)
+        return quantized.to(torch.bfloat16) * scale.to(torch.bfloat16)
+    return W
+
+
+def precision_accuracy_report(model, prompt: str,
+                              concepts: List[str],
+                              precision: str = "bf16",
+                              potential_paths: Optional[List[List[str]]] = None,
+                              target_positions: Optional[List[int]] = None,
+                              patch_positions: Optional[List[int]] = None) -> Dict:
+    """
+    Measure how far reduced-precision tracing drifts from fp32.
+
+    Parameters:
+    -----------
+    model : HookedTransformer
+        The transformer model to analyze
+    prompt : str
+        The input text prompt
+    concepts : List[str]
+        Concepts to trace
+    precision : str
+        Reduced precision mode to compare against fp32 ("bf16" or "int8")
+    potential_paths : Optional[List[List[str]]]
+        Reasoning paths to compare best-path selection and in-order flags for
+    target_positions : Optional[List[int]]
+        Token positions for the causal intervention comparison; the intervention
+        comparison is skipped when None, as it is the expensive part. Interventions
+        have no int8 path, so for "int8" this compares the bf16 intervention
+        (recorded as "intervention_precision")
+    patch_positions : Optional[List[int]]
+        Token positions to patch during intervention
+
+    Returns:
+    --------
+    Dict
+        Per-concept activation grid error, peak layer/position agreement and,
+        if requested, recovery grid error and path analysis agreement
+    """
+    from llm_reasoning_tracer.concept_extraction import extract_concept_activations
+    from llm_reasoning_tracer.reasoning_analysis import analyze_reasoning_paths
+    from llm_reasoning_tracer.causal_intervention import perform_causal_intervention
+
+    check_precision(precision)
+
+    reference = extract_concept_activations(model, prompt, concepts, [], precision="fp32")
+    reduced = extract_concept_activations(model, prompt, concepts, [], precision=precision)
+
+    report = {
+        "prompt": prompt,
+        "precision": precision,
+        "activation_grid": {},
+        "peaks": {}
+    }
+
+    for concept in concepts:
+        ref_grid = reference["activation_grid"][concept]
+        low_grid = reduced["activation_grid"][concept].astype(np.float64)
+        abs_err = np.abs(ref_grid - low_grid)
+        scale = max(np.max(np.abs(ref_grid)), 1e-12)
+        report["activation_grid"][concept] = {
+            "max_abs_error": float(np.max(abs_err)),
+            "mean_abs_error": float(np.mean(abs_err)),
+            "max_rel_error": float(np.max(abs_err) / scale)
+        }
+
+        ref_layer, ref_pos = np.unravel_index(np.argmax(ref_grid), ref_grid.shape)
+        low_layer, low_pos = np.unravel_index(np.argmax(low_grid), low_grid.shape)
+        report["peaks"][concept] = {
+            "fp32": {"layer": int(ref_layer), "position": int(ref_pos)},
+            precision: {"layer": int(low_layer), "position": int(low_pos)},
+            "layer_match": bool(ref_layer == low_layer),
+            "position_match": bool(ref_pos == low_pos),
+            "layer_max_probs_max_abs_error": float(np.max(np.abs(
+                reference["layer_max_probs"][concept] - reduced["layer_max_probs"][concept].astype(np.float64)
+            )))
+        }
+
+    if potential_paths:
+        ref_paths = analyze_reasoning_paths(model, prompt, potential_paths, precision="fp32")
+        low_paths = analyze_reasoning_paths(model, prompt, potential_paths, precision=precision)
+        ref_scores = {tuple(p["path"]): p for p in ref_paths["path_scores"]}
+        low_scores = {tuple(p["path"]): p for p in low_paths["path_scores"]}
+        report["paths"] = {
+            "best_path_match": ref_paths["best_path"] == low_paths["best_path"],
+            "score_max_abs_error": max(
+                abs(ref_scores[path]["score"] - low_scores[path]["score"]) for path in ref_scores
+            ),
+            "in_order_match": all(
+                ref_scores[path].get("in_order") == low_scores[path].get("in_order") for path in ref_scores
+            )
+        }
+
+    if target_positions is not None:
+        ref_int = perform_causal_intervention(model, prompt, concepts, target_positions,
+                                              patch_positions, precision="fp32")
+        low_int = perform_causal_intervention(model, prompt, concepts, target_positions,
+                                              patch_positions, precision=precision)
+        # perform_causal_intervention runs "int8" as "bf16".
+        report["intervention_precision"] = "bf16" if precision == "int8" else precision
+        report["intervention_grids"] = {}
+        for concept in concepts:
+            errors = [
+                np.abs(data["grid"] - low_int["intervention_grids"][concept][pos]["grid"].astype(np.float64))
+                for pos, data in ref_int["intervention_grids"][concept].items()
+            ]
+            if not errors:
+                continue
+            report["intervention_grids"][concept] = {
+                "max_abs_error": float(max(np.max(e) for e in errors)),
+                "mean_abs_error": float(np.mean([np.mean(e) for e in errors]))
+            }
+
+    return report
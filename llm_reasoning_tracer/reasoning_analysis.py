@@ -2,8 +2,11 @@ import numpy as np
 import torch
 from typing import List, Dict, Optional
 from llm_reasoning_tracer.concept_extraction import extract_concept_activations
+from llm_reasoning_tracer.instrumentation import traced
 
-def analyze_reasoning_paths(model, prompt: str, potential_paths: List[List[str]], concept_threshold: float = 0.2) -> Dict:
+@traced(prompt_arg="prompt")
+def analyze_reasoning_paths(model, prompt: str, potential_paths: List[List[str]], concept_threshold: float = 0.2,
+                            precision: str = "fp32") -> Dict:
     """
     Analyze potential reasoning paths using both layer and position information.
     
@@ -17,6 +20,8 @@ def analyze_reasoning_paths(model, prompt: str, potential_paths: List[List[str]]
         List of possible reasoning paths, where each path is a list of concepts
     concept_threshold : float
         Threshold for concept activation significance
+    precision : str
+        Precision mode passed to extract_concept_activations ("fp32", "bf16" or "int8")
         
     Returns:
     --------
@@ -25,8 +30,13 @@ def analyze_reasoning_paths(model, prompt: str, potential_paths: List[List[str]]
     """
     
     all_concepts = set(c for path in potential_paths for c in path)
-    results = extract_concept_activations(model, prompt, intermediate_concepts=list(all_concepts), final_concepts=[])
+    results = extract_concept_activations(model, prompt, intermediate_concepts=list(all_concepts), final_concepts=[],
+                                          precision=precision)
+    return _score_paths(prompt, results, potential_paths, concept_threshold)
 
+
+def _score_paths(prompt: str, results: Dict, potential_paths: List[List[str]], concept_threshold: float) -> Dict:
+    """Score potential_paths against extract_concept_activations results."""
     path_results = {
         "prompt": prompt,
         "potential_paths": potential_paths,
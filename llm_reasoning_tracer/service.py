@@ -0,0 +1,424 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from llm_reasoning_tracer.concept_extraction import extract_concept_activations_batch
+from llm_reasoning_tracer.reasoning_analysis import _score_paths
+from llm_reasoning_tracer.parallel_intervention import perform_causal_intervention_parallel
+from llm_reasoning_tracer.adaptive_intervention import perform_causal_intervention_adaptive
+
+KINDS = ("extract", "analyze", "intervene")
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+MAX_BODY_BYTES = 16 * 2**20
+
+
+def _jsonable(obj):
+    """Convert results (numpy arrays and scalars, int dict keys, NaN) to plain JSON values."""
+    if isinstance(obj, dict):
+        return {str(key): _jsonable(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(value) for value in obj]
+    if isinstance(obj, np.ndarray):
+        return _jsonable(obj.tolist())
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    return obj
+
+
+def _percentiles(values) -> Dict:
+    if not values:
+        return {"count": 0}
+    data = np.asarray(values) * 1000.0
+    return {
+        "count": len(data),
+        "p50_ms": float(np.percentile(data, 50)),
+        "p90_ms": float(np.percentile(data, 90)),
+        "p99_ms": float(np.percentile(data, 99)),
+        "max_ms": float(np.max(data)),
+    }
+
+
+def _check_params(kind: str, params: Dict) -> Dict:
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}, got {kind!r}")
+    if not isinstance(params, dict):
+        raise ValueError("request body must be a JSON object")
+    if not isinstance(params.get("prompt"), str):
+        raise ValueError("'prompt' (string) is required")
+    required = {"extract": "intermediate_concepts", "analyze": "potential_paths", "intervene": "concepts"}[kind]
+    if not isinstance(params.get(required), list):
+        raise ValueError(f"'{required}' (list) is required for {kind}")
+    return params
+
+
+class _Job:
+    __slots__ = ("kind", "params", "future", "enqueued", "started")
+
+    def __init__(self, kind: str, params: Dict, future: asyncio.Future):
+        self.kind = kind
+        self.params = params
+        self.future = future
+        self.enqueued = time.perf_counter()
+        self.started = None
+
+    def extraction_args(self):
+        """(intermediate, final, logit_threshold) of the extraction behind an extract/analyze job."""
+        if self.kind == "analyze":
+            concepts = sorted(set(c for path in self.params["potential_paths"] for c in path))
+            return concepts, [], 0.001
+        return (self.params["intermediate_concepts"], self.params.get("final_concepts", []),
+                self.params.get("logit_threshold", 0.001))
+
+
+class TracingService:
+    """
+    Local tracing service holding one model in memory.
+
+    Requests are queued and coalesced: the batcher takes the first waiting
+    request, collects more until max_batch_size or max_wait_ms, and sends
+    extract and analyze requests with the same precision and threshold through
+    one right-padded forward pass (extract_concept_activations_batch). Each
+    intervention request runs on its own. All model work runs on one
+    dedicated executor thread. Batches run one at a time: requests arriving
+    while a batch runs wait in the queue and are collected into the next
+    batch once it finishes.
+
+    Parameters:
+    -----------
+    model : HookedTransformer
+        The transformer model to serve
+    max_batch_size : int
+        Most requests coalesced into one batch
+    max_wait_ms : float
+        How long the first request of a batch waits for others to join
+    max_batch_tokens : int
+        Cap on batch size x padded length of one forward pass
+    latency_window : int
+        Number of recent requests kept for latency percentiles
+    """
+
+    def __init__(self, model,
+                 max_batch_size: int = 8,
+                 max_wait_ms: float = 10.0,
+                 max_batch_tokens: int = 8192,
+                 latency_window: int = 1000):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_tokens = max_batch_tokens
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tracer-model")
+        self.queue: Optional[asyncio.Queue] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        self.started_at = time.time()
+        self._latency = {kind: deque(maxlen=latency_window) for kind in KINDS}
+        self._queue_wait = deque(maxlen=latency_window)
+        self._batch_sizes = deque(maxlen=latency_window)
+        self._batcher_task = None
+
+    async def submit(self, kind: str, params: Dict) -> Dict:
+        """Queue one request and wait for its result."""
+        _check_params(kind, params)
+        if self._batcher_task is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(_Job(kind, params, future))
+        return await future
+
+    def start(self):
+        """Start the batcher on the running event loop (serve() does this)."""
+        if self._batcher_task is None:
+            self.queue = asyncio.Queue()
+            self._batcher_task = asyncio.get_running_loop().create_task(self._batcher())
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "mean_batch_size": float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0,
+            "queue_wait": _percentiles(self._queue_wait),
+            "latency": {kind: _percentiles(values) for kind, values in self._latency.items()},
+            "uptime_s": time.time() - self.started_at,
+        }
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self.in_flight = len(batch)
+            self.batches += 1
+            self._batch_sizes.append(len(batch))
+            now = time.perf_counter()
+            for job in batch:
+                job.started = now
+                self._queue_wait.append(now - job.enqueued)
+
+            try:
+                groups = self._groups(batch)
+            except Exception as error:
+                groups = []
+                for job in batch:
+                    self._finish(job, error)
+            for group in groups:
+                try:
+                    outcomes = await loop.run_in_executor(self.executor, self._run_group, group)
+                except Exception as error:
+                    outcomes = [error] * len(group)
+                for job, outcome in zip(group, outcomes):
+                    self._finish(job, outcome)
+            self.in_flight = 0
+
+    def _groups(self, batch: List[_Job]) -> List[List[_Job]]:
+        groups = {}
+        for job in batch:
+            if job.kind == "intervene":
+                groups[("intervene", id(job))] = [job]
+                continue
+            key = ("extract", job.params.get("precision", "fp32"), job.extraction_args()[2])
+            groups.setdefault(key, []).append(job)
+
+        out = []
+        for key, jobs in groups.items():
+            if key[0] == "intervene":
+                out.append(jobs)
+                continue
+            # Split so that no forward pass exceeds max_batch_tokens padded tokens.
+            lengths = [self.model.to_tokens(job.params["prompt"]).shape[-1] for job in jobs]
+            current, longest = [], 0
+            for job, length in sorted(zip(jobs, lengths), key=lambda item: item[1]):
+                if current and max(longest, length) * (len(current) + 1) > self.max_batch_tokens:
+                    out.append(current)
+                    current, longest = [], 0
+                current.append(job)
+                longest = max(longest, length)
+            out.append(current)
+        return out
+
+    def _run_group(self, group: List[_Job]) -> List:
+        """Runs on the executor thread; returns one result or exception per job."""
+        if group[0].kind == "intervene":
+            try:
+                return [self._intervene(group[0].params)]
+            except Exception as error:
+                return [error]
+        try:
+            return self._extract_group(group)
+        except Exception:
+            if len(group) == 1:
+                raise
+            # Retry one by one so a bad request only fails itself.
+            outcomes = []
+            for job in group:
+                try:
+                    outcomes.extend(self._extract_group([job]))
+                except Exception as error:
+                    outcomes.append(error)
+            return outcomes
+
+    def _extract_group(self, group: List[_Job]) -> List[Dict]:
+        args = [job.extraction_args() for job in group]
+        concept_results = extract_concept_activations_batch(
+            self.model,
+            [job.params["prompt"] for job in group],
+            [intermediate for intermediate, _, _ in args],
+            [final for _, final, _ in args],
+            logit_threshold=args[0][2],
+            precision=group[0].params.get("precision", "fp32")
+        )
+        outcomes = []
+        for job, results in zip(group, concept_results):
+            if job.kind == "analyze":
+                results = _score_paths(job.params["prompt"], results, job.params["potential_paths"],
+                                       job.params.get("concept_threshold", 0.2))
+            outcomes.append(results)
+        return outcomes
+
+    def _intervene(self, params: Dict) -> Dict:
+        kwargs = dict(target_positions=params.get("target_positions"),
+                      patch_positions=params.get("patch_positions"),
+                      precision=params.get("precision", "fp32"))
+        adaptive = params.get("adaptive")
+        if adaptive:
+            options = adaptive if isinstance(adaptive, dict) else {}
+            return perform_causal_intervention_adaptive(self.model, params["prompt"], params["concepts"],
+                                                        **kwargs, **options)
+        return perform_causal_intervention_parallel(self.model, params["prompt"], params["concepts"],
+                                                    n_workers=1, **kwargs)
+
+    def _finish(self, job: _Job, outcome):
+        latency = time.perf_counter() - job.enqueued
+        self._latency[job.kind].append(latency)
+        if job.future.done():
+            return
+        if isinstance(outcome, Exception):
+            self.failed += 1
+            job.future.set_exception(outcome)
+        else:
+            self.completed += 1
+            job.future.set_result(outcome)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY_BYTES:
+                await self._respond(writer, 413, {"error": "request body too large"})
+                return
+            body = await reader.readexactly(length) if length else b""
+            await self._route(method, path.split("?", 1)[0], body, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as error:
+            await self._respond(writer, 400, {"error": str(error)})
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter):
+        if path == "/health":
+            await self._respond(writer, 200, {"status": "ok"})
+            return
+        if path == "/stats":
+            await self._respond(writer, 200, self.stats())
+            return
+
+        kind = path.strip("/")
+        if kind not in KINDS + ("batch",):
+            await self._respond(writer, 404, {"error": f"unknown endpoint {path}"})
+            return
+        if method != "POST":
+            await self._respond(writer, 405, {"error": "use POST"})
+            return
+        try:
+            params = json.loads(body or b"{}")
+        except json.JSONDecodeError as error:
+            await self._respond(writer, 400, {"error": f"invalid JSON: {error}"})
+            return
+
+        if kind == "batch":
+            await self._stream_batch(params, writer)
+            return
+        try:
+            result = await self.submit(kind, params)
+        except (ValueError, KeyError, TypeError) as error:
+            await self._respond(writer, 400, {"error": str(error)})
+            return
+        except Exception as error:
+            await self._respond(writer, 500, {"error": f"{type(error).__name__}: {error}"})
+            return
+        await self._respond(writer, 200, _jsonable(result))
+
+    async def _stream_batch(self, params, writer: asyncio.StreamWriter):
+        """Run {"requests": [{"kind": ..., ...}, ...]} and stream NDJSON lines as each completes."""
+        requests = params.get("requests") if isinstance(params, dict) else None
+        if not isinstance(requests, list):
+            await self._respond(writer, 400, {"error": "'requests' (list) is required"})
+            return
+
+        async def run(index, request):
+            try:
+                request = dict(request)
+                kind = request.pop("kind", None)
+                return {"index": index, "kind": kind, "result": _jsonable(await self.submit(kind, request))}
+            except Exception as error:
+                return {"index": index, "error": f"{type(error).__name__}: {error}"}
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        tasks = [asyncio.ensure_future(run(i, request)) for i, request in enumerate(requests)]
+        for next_done in asyncio.as_completed(tasks):
+            line = json.dumps(await next_done).encode() + b"\n"
+            writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload):
+        body = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_socket: Optional[str] = None):
+        """Serve HTTP on host:port (or a Unix socket) until cancelled."""
+        self.start()
+        if unix_socket:
+            server = await asyncio.start_unix_server(self._handle, path=unix_socket)
+            address = unix_socket
+        else:
+            server = await asyncio.start_server(self._handle, host, port)
+            address = "http://{}:{}".format(*server.sockets[0].getsockname()[:2])
+        print(f"Tracing service listening on {address}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._batcher_task.cancel()
+            self.executor.shutdown(wait=False)
+
+
+def serve(model, host: str = "127.0.0.1", port: int = 8765, unix_socket: Optional[str] = None, **kwargs):
+    """Run a TracingService for model until interrupted."""
+    try:
+        asyncio.run(TracingService(model, **kwargs).serve(host, port, unix_socket))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the reasoning tracer over local HTTP.")
+    parser.add_argument("--model", default="meta-llama/Llama-3.2-3B-Instruct")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", default=None)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--max-batch-tokens", type=int, default=8192)
+    args = parser.parse_args()
+
+    from transformer_lens import HookedTransformer
+    model = HookedTransformer.from_pretrained(args.model, device=args.device)
+    model.eval()
+    serve(model, args.host, args.port, args.unix_socket, max_batch_size=args.max_batch_size,
+          max_wait_ms=args.max_wait_ms, max_batch_tokens=args.max_batch_tokens)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import numpy as np
+from typing import Dict, Optional
+
+
+class SparseGrid:
+    """
+    Thresholded, row-compressed storage for an activation or intervention grid.
+
+    Kept cells are stored row by row (CSR layout) with column indices
+    delta-encoded within each row, so long prompts with few significant cells
+    cost a few bytes per kept cell instead of 8 bytes per cell. Cells that were
+    dropped read back as 0.0; NaN cells (unevaluated in adaptive sweeps) are
+    always kept.
+    """
+
+    def __init__(self, shape, indptr, col_deltas, values):
+        self.shape = tuple(shape)
+        self.indptr = indptr
+        self.col_deltas = col_deltas
+        self.values = values
+
+    @classmethod
+    def from_dense(cls, grid: np.ndarray,
+                   threshold: float = 0.0,
+                   top_k: Optional[int] = None,
+                   dtype=np.float16) -> "SparseGrid":
+        """
+        Compress a dense 2D grid.
+
+        Parameters:
+        -----------
+        grid : np.ndarray
+            Dense (rows x columns) grid
+        threshold : float
+            Cells with |value| <= threshold are dropped
+        top_k : Optional[int]
+            If given, keep at most the top_k largest |value| cells per row
+            (NaN cells are kept in addition)
+        dtype : numpy dtype
+            Storage dtype for kept values (np.float16 or np.float32)
+        """
+        grid = np.asarray(grid)
+        n_rows, n_cols = grid.shape
+        missing = np.isnan(grid)
+        magnitude = np.where(missing, 0.0, np.abs(grid))
+        keep = magnitude > threshold
+        if top_k is not None and top_k < n_cols:
+            order = np.argsort(-magnitude, axis=1, kind="stable")[:, :top_k]
+            top_mask = np.zeros_like(keep)
+            np.put_along_axis(top_mask, order, True, axis=1)
+            keep &= top_mask
+        keep |= missing
+
+        rows, cols = np.nonzero(keep)
+        indptr = np.zeros(n_rows + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+
+        col_deltas = np.diff(cols, prepend=0)
+        # First kept column of each row is stored absolute, the rest as gaps.
+        starts = indptr[:-1][indptr[:-1] < indptr[1:]]
+        col_deltas[starts] = cols[starts]
+        index_dtype = np.uint16 if n_cols <= np.iinfo(np.uint16).max else np.uint32
+
+        return cls(grid.shape, indptr, col_deltas.astype(index_dtype), grid[rows, cols].astype(dtype))
+
+    def _row_columns(self, row: int) -> np.ndarray:
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return np.cumsum(self.col_deltas[start:end].astype(np.int64))
+
+    def rows(self, start: int, end: int) -> np.ndarray:
+        """Densify rows [start, end) only."""
+        start, end, _ = slice(start, end).indices(self.shape[0])
+        out = np.zeros((max(end - start, 0), self.shape[1]), dtype=np.float64)
+        for row in range(start, end):
+            cols = self._row_columns(row)
+            out[row - start, cols] = self.values[self.indptr[row]:self.indptr[row + 1]]
+        return out
+
+    def dense(self) -> np.ndarray:
+        return self.rows(0, self.shape[0])
+
+    def __array__(self, dtype=None, copy=None):
+        out = self.dense()
+        return out if dtype is None else out.astype(dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            row_key, col_key = key[0], key[1:]
+        else:
+            row_key, col_key = key, ()
+        if isinstance(row_key, slice) and row_key.step in (None, 1):
+            start, end, _ = row_key.indices(self.shape[0])
+            out = self.rows(start, end)
+            return out[(slice(None),) + col_key] if col_key else out
+        return self.dense()[key]
+
+    def _finite_values(self):
+        """Stored non-NaN values, and whether any cell reads back as an implicit 0.0."""
+        values = self.values.astype(np.float64)
+        has_implicit_zero = len(values) < self.shape[0] * self.shape[1]
+        return values[~np.isnan(values)], has_implicit_zero
+
+    def max(self, axis=None, **kwargs):
+        """Largest value, ignoring NaN cells (NaN if every cell is NaN)."""
+        if axis is not None or kwargs.get("out") is not None:
+            return self.dense().max(axis=axis, **kwargs)
+        values, has_implicit_zero = self._finite_values()
+        if has_implicit_zero:
+            return float(max(values.max(initial=0.0), 0.0))
+        return float(values.max()) if len(values) else float("nan")
+
+    def min(self, axis=None, **kwargs):
+        """Smallest value, ignoring NaN cells (NaN if every cell is NaN)."""
+        if axis is not None or kwargs.get("out") is not None:
+            return self.dense().min(axis=axis, **kwargs)
+        values, has_implicit_zero = self._finite_values()
+        if has_implicit_zero:
+            return float(min(values.min(initial=0.0), 0.0))
+        return float(values.min()) if len(values) else float("nan")
+
+    @property
+    def nnz(self) -> int:
+        return len(self.values)
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.col_deltas.nbytes + self.values.nbytes
+
+    def __repr__(self):
+        return f"SparseGrid(shape={self.shape}, nnz={self.nnz}, dtype={self.values.dtype})"
+
+
+def densify(grid) -> np.ndarray:
+    """Return grid as a dense float array, whether it is a SparseGrid or already dense."""
+    if isinstance(grid, SparseGrid):
+        return grid.dense()
+    return np.asarray(grid)
+
+
+def grid_max(grid) -> float:
+    """Largest value of grid, ignoring NaN cells (unevaluated in adaptive sweeps); NaN if all are."""
+    if isinstance(grid, SparseGrid):
+        return grid.max()
+    grid = np.asarray(grid)
+    return float("nan") if np.isnan(grid).all() else float(np.nanmax(grid))
+
+
+def grid_min(grid) -> float:
+    """Smallest value of grid, ignoring NaN cells (unevaluated in adaptive sweeps); NaN if all are."""
+    if isinstance(grid, SparseGrid):
+        return grid.min()
+    grid = np.asarray(grid)
+    return float("nan") if np.isnan(grid).all() else float(np.nanmin(grid))
+
+
+def compress_concept_results(concept_results: Dict,
+                             threshold: float = 0.0,
+                             top_k: Optional[int] = None,
+                             dtype=np.float16) -> Dict:
+    """
+    Compress the activation grids of extract_concept_activations results.
+
+    Parameters:
+    -----------
+    concept_results : Dict
+        Results from extract_concept_activations
+    threshold : float
+        Cells with |activation| <= threshold are dropped
+    top_k : Optional[int]
+        Keep at most top_k cells per layer
+    dtype : numpy dtype
+        Storage dtype for kept values
+
+    Returns:
+    --------
+    Dict
+        Copy of the results with each activation_grid entry replaced by a SparseGrid
+        and layer_max_probs stored in dtype
+    """
+    compressed = {k: v for k, v in concept_results.items() if k not in ("activation_grid", "layer_max_probs")}
+    compressed["activation_grid"] = {
+        concept: SparseGrid.from_dense(grid, threshold=threshold, top_k=top_k, dtype=dtype)
+        for concept, grid in concept_results["activation_grid"].items()
+    }
+    if "layer_max_probs" in concept_results:
+        compressed["layer_max_probs"] = {
+            concept: np.asarray(maxes).astype(dtype)
+            for concept, maxes in concept_results["layer_max_probs"].items()
+        }
+    return compressed
+
+
+def compress_intervention_results(intervention_results: Dict,
+                                  threshold: float = 0.01,
+                                  top_k: Optional[int] = None,
+                                  dtype=np.float16) -> Dict:
+    """
+    Compress the recovery grids of perform_causal_intervention results.
+
+    Parameters:
+    -----------
+    intervention_results : Dict
+        Results from perform_causal_intervention
+    threshold : float
+        Cells with |recovery| <= threshold are dropped; NaN (unevaluated) cells
+        of adaptive results are kept
+    top_k : Optional[int]
+        Keep at most top_k cells per layer
+    dtype : numpy dtype
+        Storage dtype for kept values
+
+    Returns:
+    --------
+    Dict
+        Copy of the results with each grid replaced by a SparseGrid
+    """
+    compressed = {k: v for k, v in intervention_results.items() if k != "intervention_grids"}
+    compressed["intervention_grids"] = {}
+    for concept, grids in intervention_results["intervention_grids"].items():
+        compressed["intervention_grids"][concept] = {}
+        for pos, pos_data in grids.items():
+            entry = dict(pos_data)
+            entry["grid"] = SparseGrid.from_dense(pos_data["grid"], threshold=threshold, top_k=top_k, dtype=dtype)
+            compressed["intervention_grids"][concept][pos] = entry
+    return compressed
+
+
+def result_nbytes(results: Dict) -> int:
+    """Total bytes held by the grids of concept or intervention results."""
+    total = 0
+    for grid in results.get("activation_grid", {}).values():
+        total += grid.nbytes
+    for grids in results.get("intervention_grids", {}).values():
+        for pos_data in grids.values():
+            total += pos_data["grid"].nbytes
+    return total
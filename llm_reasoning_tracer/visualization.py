@@ -1,13 +1,65 @@
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
+from __future__ import annotations
+
 import numpy as np
-import seaborn as sns
-from matplotlib.patches import FancyArrowPatch
-from matplotlib.animation import FuncAnimation, PillowWriter
-from IPython.display import HTML
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, TYPE_CHECKING
 import warnings
+from llm_reasoning_tracer.lazy_imports import LazyModule, select_headless_backend
+from llm_reasoning_tracer.sparse_results import densify, grid_max, grid_min
+from llm_reasoning_tracer.instrumentation import traced
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+    import matplotlib.animation as animation
+    from IPython.display import HTML
+
+# matplotlib, seaborn and IPython are only imported when a plot is first made.
+plt = LazyModule("matplotlib.pyplot", before_import=select_headless_backend)
+animation = LazyModule("matplotlib.animation", before_import=select_headless_backend)
+patches = LazyModule("matplotlib.patches")
+sns = LazyModule("seaborn", before_import=select_headless_backend)
+
+
+def compress_layers(grid: np.ndarray, compression_factor: int, reduce: str = "mean") -> np.ndarray:
+    """
+    Collapse consecutive layers of a (n_layers x n_tokens) grid into bins.
+
+    Parameters:
+    -----------
+    grid : np.ndarray
+        Activation grid with layers along axis 0
+    compression_factor : int
+        Number of layers per bin; the last bin may be smaller
+    reduce : str
+        "mean" or "max" over the layers of each bin
+
+    Returns:
+    --------
+    np.ndarray
+        (ceil(n_layers / compression_factor) x n_tokens) grid
+    """
+    n_layers = grid.shape[0]
+    starts = np.arange(0, n_layers, compression_factor)
+    if reduce == "max":
+        return np.maximum.reduceat(grid, starts, axis=0)
+    sizes = np.diff(np.append(starts, n_layers))
+    return np.add.reduceat(grid, starts, axis=0) / sizes[:, None]
+
+
+def diagonal_reveal_frames(grid: np.ndarray) -> np.ndarray:
+    """
+    Frames of an anti-diagonal reveal of grid: frame k shows cells with layer + position <= k.
 
+    Returns:
+    --------
+    np.ndarray
+        (n_rows + n_cols - 1, n_rows, n_cols) array of frames
+    """
+    n_rows, n_cols = grid.shape
+    diagonal_index = np.add.outer(np.arange(n_rows), np.arange(n_cols))
+    steps = np.arange(n_rows + n_cols - 1)
+    return np.where(diagonal_index[None, :, :] <= steps[:, None, None], grid[None, :, :], 0.0)
+
+@traced()
 def plot_concept_activation_heatmap(concept_results: Dict,
                                    selected_concepts: Optional[List[str]] = None,
                                    compression_factor: int = 2,
@@ -54,21 +106,16 @@ def plot_concept_activation_heatmap(concept_results: Dict,
 
     cmap = sns.color_palette("rocket", as_cmap=True)
 
-    vmax = max(np.max(concept_results["activation_grid"][concept]) for concept in selected_concepts)
+    vmax = max(grid_max(concept_results["activation_grid"][concept]) for concept in selected_concepts)
 
     for i, concept in enumerate(selected_concepts):
         ax = axes[i, 0]
-        grid = concept_results["activation_grid"][concept]
+        grid = densify(concept_results["activation_grid"][concept])
 
         n_layers, n_tokens = grid.shape
         compressed_n_layers = (n_layers + compression_factor - 1) // compression_factor
 
-        compressed_grid = np.zeros((compressed_n_layers, n_tokens))
-
-        for j in range(compressed_n_layers):
-            start = j * compression_factor
-            end = min((j+1) * compression_factor, n_layers)
-            compressed_grid[j, :] = np.mean(grid[start:end, :], axis=0)
+        compressed_grid = compress_layers(grid, compression_factor, reduce="mean")
 
         from scipy.ndimage import gaussian_filter
         compressed_grid = gaussian_filter(compressed_grid, sigma=0.8)
@@ -105,33 +152,11 @@ def plot_concept_activation_heatmap(concept_results: Dict,
     return fig
 
 
-def animate_concept_activation_diagonal(concept_results: Dict,
-                                        selected_concepts: Optional[List[str]] = None,
-                                        compression_factor: int = 2,
-                                        figsize=(10, 6),
-                                        interval=100) -> HTML:
-    """
-    Animate concept activation flowing diagonally through network layers.
-    
-    Parameters:
-    -----------
-    concept_results : Dict
-        Results from extract_concept_activations
-    selected_concepts : Optional[List[str]]
-        Specific concepts to visualize
-    compression_factor : int
-        Factor by which to compress layers for visualization
-    figsize : tuple
-        Figure size
-    interval : int
-        Animation interval in milliseconds
-        
-    Returns:
-    --------
-    HTML
-        HTML animation for Jupyter display
-    """
-    
+def _diagonal_figure(concept_results: Dict,
+                     selected_concepts: Optional[List[str]],
+                     compression_factor: int,
+                     figsize):
+    """Build the diagonal-reveal figure with an empty image; returns (fig, ax, im, frames)."""
     all_concepts = concept_results["intermediate_concepts"] + concept_results["final_concepts"]
     if selected_concepts is None:
         selected_concepts = all_concepts
@@ -142,15 +167,11 @@ def animate_concept_activation_diagonal(concept_results: Dict,
 
     concept = selected_concepts[0]
 
-    grid = concept_results["activation_grid"][concept]
+    grid = densify(concept_results["activation_grid"][concept])
     n_layers, n_tokens = grid.shape
     compressed_n_layers = (n_layers + compression_factor - 1) // compression_factor
 
-    compressed_grid = np.zeros((compressed_n_layers, n_tokens))
-    for j in range(compressed_n_layers):
-        start = j * compression_factor
-        end = min((j+1) * compression_factor, n_layers)
-        compressed_grid[j, :] = np.max(grid[start:end, :], axis=0)
+    compressed_grid = compress_layers(grid, compression_factor, reduce="max")
 
     from scipy.ndimage import gaussian_filter
     compressed_grid = gaussian_filter(compressed_grid, sigma=0.8)
@@ -183,68 +204,73 @@ def animate_concept_activation_diagonal(concept_results: Dict,
 
     fig.colorbar(im, ax=ax, pad=0.01, shrink=0.7, label='Activation Strength')
 
-    max_step = compressed_n_layers + n_tokens - 2
+    frames = diagonal_reveal_frames(compressed_grid)
 
-    def update(step):
-        partial = np.zeros_like(compressed_grid)
-        for l in range(compressed_n_layers):
-            for p in range(n_tokens):
-                if (l + p) <= step:
-                    partial[l, p] = compressed_grid[l, p]
-        im.set_data(partial)
-        return [im]
+    return fig, ax, im, frames
 
-    ani = FuncAnimation(fig, update, frames=max_step+1,
-                        interval=interval, blit=True, repeat=True)
 
-    plt.close(fig)
-    return ani
-
-
-
-def animate_reasoning_flow(path_results: Dict,
-                          tokens: List[str],
-                          model_layers: int,
-                          figsize=(10, 4),
-                          interval=700,
-                          compression_factor=2) -> animation.FuncAnimation:
+@traced()
+def animate_concept_activation_diagonal(concept_results: Dict,
+                                        selected_concepts: Optional[List[str]] = None,
+                                        compression_factor: int = 2,
+                                        figsize=(10, 6),
+                                        interval=100) -> HTML:
     """
-    Animate the flow of reasoning through the model.
+    Animate concept activation flowing diagonally through network layers.
     
     Parameters:
     -----------
-    path_results : Dict
-        Results from analyze_reasoning_paths
-    tokens : List[str]
-        Tokens from the prompt
-    model_layers : int
-        Number of layers in the model
+    concept_results : Dict
+        Results from extract_concept_activations
+    selected_concepts : Optional[List[str]]
+        Specific concepts to visualize
+    compression_factor : int
+        Factor by which to compress layers for visualization
     figsize : tuple
         Figure size
     interval : int
         Animation interval in milliseconds
-    compression_factor : int
-        Factor by which to compress layers for visualization
         
     Returns:
     --------
-    animation.FuncAnimation
-        Matplotlib animation of reasoning flow
+    HTML
+        HTML animation for Jupyter display
     """
     
+    fig, ax, im, frames = _diagonal_figure(concept_results, selected_concepts, compression_factor, figsize)
+
+    def update(step):
+        im.set_data(frames[step])
+        return [im]
+
+    ani = animation.FuncAnimation(fig, update, frames=len(frames),
+                        interval=interval, blit=True, repeat=True)
+
+    plt.close(fig)
+    return ani
+
+
+
+def _reasoning_flow_figure(path_results, tokens, model_layers, figsize, compression_factor):
+    """
+    Build the light reasoning-flow figure and its frame callback.
+
+    Returns (fig, animate, n_frames); animate is None when there is no path to
+    draw and the figure only holds a message.
+    """
     fig, ax = plt.subplots(figsize=figsize)
     ax.set_facecolor('white')
 
     if not path_results.get("best_path") or not path_results.get("path_details"):
         ax.text(0.5, 0.5, "No valid reasoning path found", ha='center', va='center', fontsize=14)
         ax.axis('off')
-        return fig
+        return fig, None, 1
 
     best_path_details = next((d for d in path_results["path_details"] if d["path"] == path_results["best_path"]), None)
     if not best_path_details:
         ax.text(0.5, 0.5, "No valid path details found", ha='center', va='center', fontsize=14)
         ax.axis('off')
-        return fig
+        return fig, None, 1
 
     concept_peaks = best_path_details["concept_peaks"]
     concepts = [peak["concept"] for peak in concept_peaks]
@@ -317,7 +343,7 @@ def animate_reasoning_flow(path_results: Dict,
         elif frame_idx < len(positions) + len(positions) - 1:
             idx = frame_idx - len(positions)
             if idx + 1 < len(positions):
-                arrow = FancyArrowPatch(
+                arrow = patches.FancyArrowPatch(
                     (positions[idx], compressed_layers[idx]),
                     (positions[idx+1], compressed_layers[idx+1]),
                     connectionstyle="arc3,rad=0.25",
@@ -330,26 +356,64 @@ def animate_reasoning_flow(path_results: Dict,
                 ax.add_patch(arrow)
                 arrows.append(arrow)
 
+    plt.tight_layout(pad=1)
+    return fig, animate, len(positions) + len(positions)
+
+
+@traced()
+def animate_reasoning_flow(path_results: Dict,
+                          tokens: List[str],
+                          model_layers: int,
+                          figsize=(10, 4),
+                          interval=700,
+                          compression_factor=2) -> animation.FuncAnimation:
+    """
+    Animate the flow of reasoning through the model.
+    
+    Parameters:
+    -----------
+    path_results : Dict
+        Results from analyze_reasoning_paths
+    tokens : List[str]
+        Tokens from the prompt
+    model_layers : int
+        Number of layers in the model
+    figsize : tuple
+        Figure size
+    interval : int
+        Animation interval in milliseconds
+    compression_factor : int
+        Factor by which to compress layers for visualization
+        
+    Returns:
+    --------
+    animation.FuncAnimation
+        Matplotlib animation of reasoning flow
+    """
+    
+    fig, animate, n_frames = _reasoning_flow_figure(
+        path_results, tokens, model_layers, figsize, compression_factor
+    )
+    if animate is None:
+        return fig
+
     anim = animation.FuncAnimation(
         fig, animate,
-        frames=len(positions) + len(positions),
+        frames=n_frames,
         interval=interval,
         repeat=False
     )
 
-    plt.tight_layout(pad=1)
     plt.close(fig)
     return anim
 
 
-def animate_reasoning_flow_dark(path_results,
-                               tokens,
-                               model_layers,
-                               figsize=(10, 3.5),
-                               interval=700,
-                               compression_factor=2):
+def _reasoning_flow_dark_figure(path_results, tokens, model_layers, figsize, compression_factor):
     """
-    Fixed version that properly saves animations with original animation behavior
+    Build the dark reasoning-flow figure and its frame callbacks.
+
+    Returns (fig, init, animate, n_frames); init and animate are None when there
+    is no path to draw and the figure only holds a message.
     """
     fig, ax = plt.subplots(figsize=figsize, dpi=150)
     fig.patch.set_facecolor('black')
@@ -361,13 +425,13 @@ def animate_reasoning_flow_dark(path_results,
     if not path_results.get("best_path") or not path_results.get("path_details"):
         ax.text(0.5, 0.5, "No valid reasoning path found", ha='center', va='center', fontsize=14, color='white')
         ax.axis('off')
-        return animation.FuncAnimation(fig, lambda x: None, frames=1)
+        return fig, None, None, 1
 
     best_path_details = next((d for d in path_results["path_details"] if d["path"] == path_results["best_path"]), None)
     if not best_path_details:
         ax.text(0.5, 0.5, "No valid path details found", ha='center', va='center', fontsize=14, color='white')
         ax.axis('off')
-        return animation.FuncAnimation(fig, lambda x: None, frames=1)
+        return fig, None, None, 1
 
     concept_peaks = best_path_details["concept_peaks"]
     concepts = [peak["concept"] for peak in concept_peaks]
@@ -475,8 +539,7 @@ def animate_reasoning_flow_dark(path_results,
                 end_x = positions[idx+1]
                 end_y = compressed_layers[idx+1]
 
-                from matplotlib.patches import FancyArrowPatch
-                arrow = FancyArrowPatch(
+                arrow = patches.FancyArrowPatch(
                     (start_x, start_y),
                     (end_x, end_y),
                     connectionstyle="arc3,rad=0.25",
@@ -494,19 +557,39 @@ def animate_reasoning_flow_dark(path_results,
         
         return artists_to_update
 
+    plt.tight_layout(pad=0.8)
+    return fig, init, animate, len(positions) + len(positions) - 1
+
+
+@traced()
+def animate_reasoning_flow_dark(path_results,
+                               tokens,
+                               model_layers,
+                               figsize=(10, 3.5),
+                               interval=700,
+                               compression_factor=2):
+    """
+    Fixed version that properly saves animations with original animation behavior
+    """
+    fig, init, animate, n_frames = _reasoning_flow_dark_figure(
+        path_results, tokens, model_layers, figsize, compression_factor
+    )
+    if animate is None:
+        return animation.FuncAnimation(fig, lambda x: None, frames=1)
+
     anim = animation.FuncAnimation(
         fig, animate,
         init_func=init,
-        frames=len(positions) + len(positions) - 1,
+        frames=n_frames,
         interval=interval,
         blit=True,  
         repeat=False
     )
     
-    plt.tight_layout(pad=0.8)
     return anim, fig
 
 
+@traced()
 def plot_layer_position_intervention(intervention_results: Dict,
                                     selected_concepts: Optional[List[str]] = None,
                                     top_k_positions: int = 3,
@@ -566,13 +649,18 @@ def plot_layer_position_intervention(intervention_results: Dict,
                              squeeze=False)
     axes = np.atleast_2d(axes)
 
-    cmap = sns.diverging_palette(0, 240, s=100, l=60, as_cmap=True)
+    # Cells left unevaluated by perform_causal_intervention_adaptive are NaN.
+    cmap = sns.diverging_palette(0, 240, s=100, l=60, as_cmap=True).with_extremes(bad="lightgray")
     vmin, vmax = 0, 0
     for concept in selected_concepts:
         for pos_data in intervention_results["intervention_grids"].get(concept, {}).values():
             grid = pos_data["grid"]
-            vmin = min(vmin, np.min(grid))
-            vmax = max(vmax, np.max(grid))
+            grid_low, grid_high = grid_min(grid), grid_max(grid)
+            if np.isnan(grid_high):
+                # Entirely unevaluated grid.
+                continue
+            vmin = min(vmin, grid_low)
+            vmax = max(vmax, grid_high)
     limit = max(abs(vmin), abs(vmax))
     vmin, vmax = -limit, limit
 
@@ -589,7 +677,7 @@ def plot_layer_position_intervention(intervention_results: Dict,
                 ax.axis('off')
                 continue
 
-            grid = pos_data["grid"]
+            grid = densify(pos_data["grid"])
             patch_positions = pos_data["patch_positions"]
             corrupt_token = pos_data["token"]
 
@@ -620,8 +708,9 @@ def plot_layer_position_intervention(intervention_results: Dict,
     plt.close(fig)
     return fig
 
+@traced()
 def save_animation(path_results, tokens, model_layers, output_path, 
-                           format="gif", fps=10, dpi=150):
+                           format="gif", fps=10, dpi=150, backend="matplotlib"):
     """
     Properly save the animation as either GIF or MP4
     
@@ -641,7 +730,19 @@ def save_animation(path_results, tokens, model_layers, output_path,
         Frames per second
     dpi: int
         DPI for the saved animation
+    backend: str
+        "matplotlib" (FuncAnimation + writer, returns the animation) or
+        "framebuffer" (fast_render: static background drawn once, frames
+        encoded directly; returns the output path)
     """
+    if backend == "framebuffer":
+        from llm_reasoning_tracer.fast_render import render_reasoning_flow
+        render_reasoning_flow(path_results, tokens, model_layers, output_path,
+                              dark=True, figsize=(10, 4), compression_factor=2, fps=fps, dpi=dpi,
+                              format=format)
+        print(f"Animation saved to {output_path}")
+        return output_path
+
     anim, fig = animate_reasoning_flow_dark(
         path_results=path_results,
         tokens=tokens,
@@ -655,7 +756,7 @@ def save_animation(path_results, tokens, model_layers, output_path,
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
     if format.lower() == "gif":
-        writer = PillowWriter(fps=fps)
+        writer = animation.PillowWriter(fps=fps)
         anim.save(output_path, writer=writer, dpi=dpi)
     else:
         try:
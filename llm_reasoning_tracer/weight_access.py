@@ -0,0 +1,279 @@
+import glob
+import json
+import os
+import torch
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from llm_reasoning_tracer.precision import check_precision, columns_at_precision
+
+# Tensors holding the unembedding, most specific first. TransformerLens state
+# dicts store W_U as (d_model, d_vocab) and already processed; Hugging Face
+# checkpoints store (d_vocab, d_model) rows, tied to the embedding in some models.
+TRANSFORMER_LENS_UNEMBED_KEY = "unembed.W_U"
+HF_UNEMBED_KEYS = ["lm_head.weight", "embed_out.weight", "model.embed_tokens.weight", "transformer.wte.weight"]
+HF_LN_FINAL_KEYS = [("model.norm.weight", None),
+                    ("transformer.ln_f.weight", "transformer.ln_f.bias"),
+                    ("gpt_neox.final_layer_norm.weight", "gpt_neox.final_layer_norm.bias")]
+
+
+class CheckpointWeights:
+    """
+    Lazy, memory-mapped access to the tensors of a local checkpoint.
+
+    Supports safetensors files (single file, a directory of shards, or a
+    sharded checkpoint with model.safetensors.index.json) and torch .pt/.bin
+    files, which are loaded with mmap=True. Tensors are only read when asked
+    for. Unembedding columns are read for the requested token IDs only and
+    memoized, so the full vocabulary-sized W_U is never held in memory.
+
+    Can stand in for the model in extract_concept_activations(..., residuals=...).
+
+    Parameters:
+    -----------
+    path : str
+        Checkpoint file or directory
+    tokenizer : optional
+        Tokenizer for concept lookups; by default loaded with AutoTokenizer
+        from the checkpoint directory if it contains tokenizer files
+    processing : str
+        How to turn the stored unembedding into TransformerLens' W_U:
+        "auto" (none for TransformerLens state dicts, "transformer_lens" otherwise),
+        "transformer_lens" (fold ln_final, center as HookedTransformer.from_pretrained
+        does by default) or "none"
+    max_cached_columns : int
+        Most unembedding columns kept in memory
+    """
+
+    def __init__(self, path: str,
+                 tokenizer=None,
+                 processing: str = "auto",
+                 max_cached_columns: int = 65536):
+        if processing not in ("auto", "transformer_lens", "none"):
+            raise ValueError(f"processing must be 'auto', 'transformer_lens' or 'none', got {processing!r}")
+        self.path = path
+        self.directory = path if os.path.isdir(path) else os.path.dirname(path)
+        self._files = self._index_files(path)
+        self._torch_state = {}
+
+        if TRANSFORMER_LENS_UNEMBED_KEY in self._files:
+            self.unembed_key = TRANSFORMER_LENS_UNEMBED_KEY
+        else:
+            self.unembed_key = next((key for key in HF_UNEMBED_KEYS if key in self._files), None)
+        if self.unembed_key is None:
+            raise KeyError(f"no unembedding tensor found in {path} (looked for "
+                           f"{[TRANSFORMER_LENS_UNEMBED_KEY] + HF_UNEMBED_KEYS})")
+        if processing == "auto":
+            processing = "none" if self.unembed_key == TRANSFORMER_LENS_UNEMBED_KEY else "transformer_lens"
+        self.processing = processing
+
+        self.ln_final_keys = (None, None)
+        if processing == "transformer_lens":
+            self.ln_final_keys = next(((w, b if b in self._files else None) for w, b in HF_LN_FINAL_KEYS
+                                       if w in self._files), (None, None))
+
+        if tokenizer is None and glob.glob(os.path.join(self.directory, "tokenizer*")):
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(self.directory)
+        self.tokenizer = tokenizer
+
+        self.max_cached_columns = max_cached_columns
+        self._columns = OrderedDict()
+        self._token_ids = {}
+        self._row_mean = None
+
+    @staticmethod
+    def _index_files(path: str) -> Dict[str, str]:
+        """Map tensor name -> file holding it."""
+        if os.path.isdir(path):
+            index = os.path.join(path, "model.safetensors.index.json")
+            if os.path.exists(index):
+                with open(index) as f:
+                    weight_map = json.load(f)["weight_map"]
+                return {name: os.path.join(path, file) for name, file in weight_map.items()}
+            files = sorted(glob.glob(os.path.join(path, "*.safetensors")))
+            if not files:
+                files = sorted(glob.glob(os.path.join(path, "*.pt")) + glob.glob(os.path.join(path, "*.bin")))
+        else:
+            files = [path]
+        if not files:
+            raise FileNotFoundError(f"no checkpoint files found in {path}")
+
+        names = {}
+        for file in files:
+            if file.endswith(".safetensors"):
+                from safetensors import safe_open
+                with safe_open(file, framework="pt") as f:
+                    for name in f.keys():
+                        names[name] = file
+            else:
+                state = torch.load(file, map_location="cpu", mmap=True, weights_only=True)
+                for name in state:
+                    names[name] = file
+        return names
+
+    def _torch_file(self, file: str) -> Dict:
+        if file not in self._torch_state:
+            self._torch_state[file] = torch.load(file, map_location="cpu", mmap=True, weights_only=True)
+        return self._torch_state[file]
+
+    def keys(self) -> List[str]:
+        return list(self._files)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._files
+
+    def tensor(self, name: str) -> torch.Tensor:
+        """Full tensor (memory-mapped for .pt/.bin files)."""
+        file = self._files[name]
+        if file.endswith(".safetensors"):
+            from safetensors import safe_open
+            with safe_open(file, framework="pt") as f:
+                return f.get_tensor(name)
+        return self._torch_file(file)[name]
+
+    def shape(self, name: str) -> Tuple[int, ...]:
+        file = self._files[name]
+        if file.endswith(".safetensors"):
+            from safetensors import safe_open
+            with safe_open(file, framework="pt") as f:
+                return tuple(f.get_slice(name).get_shape())
+        return tuple(self._torch_file(file)[name].shape)
+
+    def rows(self, name: str, ids: List[int], dim: int = 0) -> torch.Tensor:
+        """Read only the given indices of tensor name along dim (0 or 1)."""
+        file = self._files[name]
+        if file.endswith(".safetensors"):
+            from safetensors import safe_open
+            with safe_open(file, framework="pt") as f:
+                tensor_slice = f.get_slice(name)
+                parts = [tensor_slice[i:i + 1] if dim == 0 else tensor_slice[:, i:i + 1] for i in ids]
+            return torch.cat(parts, dim=dim) if parts else torch.empty(0)
+        index = torch.tensor(ids, dtype=torch.long)
+        return self._torch_file(file)[name].index_select(dim, index).clone()
+
+    @property
+    def d_model(self) -> int:
+        shape = self.shape(self.unembed_key)
+        return shape[0] if self.unembed_key == TRANSFORMER_LENS_UNEMBED_KEY else shape[1]
+
+    @property
+    def d_vocab(self) -> int:
+        shape = self.shape(self.unembed_key)
+        return shape[1] if self.unembed_key == TRANSFORMER_LENS_UNEMBED_KEY else shape[0]
+
+    def token_id(self, concept: str) -> Optional[int]:
+        """Token ID of concept, or None if it does not encode to a single token."""
+        if concept not in self._token_ids:
+            if self.tokenizer is None:
+                raise ValueError("a tokenizer is needed to look up concepts; pass tokenizer=...")
+            ids = self.tokenizer.encode(concept, add_special_tokens=False)
+            self._token_ids[concept] = ids[0] if len(ids) == 1 else None
+        return self._token_ids[concept]
+
+    def to_single_token(self, concept: str) -> int:
+        concept_id = self.token_id(concept)
+        if concept_id is None:
+            raise ValueError(f"{concept!r} is not a single token")
+        return concept_id
+
+    def _ln_final(self):
+        weight_key, bias_key = self.ln_final_keys
+        weight = self.tensor(weight_key).float() if weight_key else None
+        return weight, bias_key is not None
+
+    def _unembed_row_mean(self, chunk_rows: int = 4096) -> torch.Tensor:
+        """Mean over the vocabulary of the stored (d_vocab x d_model) rows, read in chunks."""
+        if self._row_mean is None:
+            file = self._files[self.unembed_key]
+            total = torch.zeros(self.d_model, dtype=torch.float64)
+            if file.endswith(".safetensors"):
+                from safetensors import safe_open
+                with safe_open(file, framework="pt") as f:
+                    tensor_slice = f.get_slice(self.unembed_key)
+                    for start in range(0, self.d_vocab, chunk_rows):
+                        total += tensor_slice[start:start + chunk_rows].double().sum(dim=0)
+            else:
+                weight = self._torch_file(file)[self.unembed_key]
+                for start in range(0, self.d_vocab, chunk_rows):
+                    total += weight[start:start + chunk_rows].double().sum(dim=0)
+            self._row_mean = (total / self.d_vocab).float()
+        return self._row_mean
+
+    def unembed_columns(self, ids: List[int]) -> torch.Tensor:
+        """
+        W_U[:, ids] as float32, read on demand.
+
+        With processing="transformer_lens" the stored rows are turned into the
+        W_U that HookedTransformer.from_pretrained builds by default: ln_final
+        scale folded in, centered over d_model for LayerNorm models, and
+        centered over the vocabulary (the vocabulary mean is computed once in a
+        chunked pass over the file).
+        """
+        missing = [i for i in dict.fromkeys(ids) if i not in self._columns]
+        if missing:
+            if self.unembed_key == TRANSFORMER_LENS_UNEMBED_KEY:
+                new = self.rows(self.unembed_key, missing, dim=1).float()
+            else:
+                new = self.rows(self.unembed_key, missing, dim=0).float().T
+            if self.processing == "transformer_lens":
+                weight, layer_norm = self._ln_final()
+                mean = self._unembed_row_mean()
+                if weight is not None:
+                    new = new * weight[:, None]
+                    mean = mean * weight
+                if layer_norm:
+                    new = new - new.mean(dim=0, keepdim=True)
+                    mean = mean - mean.mean()
+                new = new - mean[:, None]
+            for k, i in enumerate(missing):
+                self._columns[i] = new[:, k].contiguous()
+                if len(self._columns) > self.max_cached_columns:
+                    self._columns.popitem(last=False)
+        for i in ids:
+            self._columns.move_to_end(i)
+        return torch.stack([self._columns[i] for i in ids], dim=1) if ids else torch.zeros(self.d_model, 0)
+
+    def unembed(self, concepts: List[str], precision: str = "fp32") -> Tuple[List[str], torch.Tensor, None]:
+        """Same contract as ConceptRegistry.unembed (without ln_final folding)."""
+        check_precision(precision)
+        kept = [concept for concept in concepts if self.token_id(concept) is not None]
+        W = self.unembed_columns([self.token_id(concept) for concept in kept])
+        return kept, columns_at_precision(W, precision).contiguous(), None
+
+
+def save_residuals(model, prompt: str, path: str, precision: str = "fp32") -> str:
+    """
+    Run the model once and store the residual stream for later projection-only analysis.
+
+    Writes a safetensors file with "resid_post" (n_layers x n_tokens x d_model)
+    and the prompt and string tokens as metadata.
+    """
+    from safetensors.torch import save_file
+    from llm_reasoning_tracer.concept_extraction import _resid_post
+
+    # Same forward configuration as extract_concept_activations.
+    model.cfg.use_attn_result = True
+    resid = _resid_post(model, [model.to_tokens(prompt)], precision)[0]
+    stacked = torch.stack([resid[layer] for layer in range(len(resid))]).contiguous()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    metadata = {"prompt": prompt, "tokens": json.dumps(model.to_str_tokens(prompt)),
+                "model_name": str(getattr(model.cfg, "model_name", ""))}
+    save_file({"resid_post": stacked}, path, metadata=metadata)
+    return path
+
+
+def load_residuals(path: str) -> Dict:
+    """Load a save_residuals file: {"prompt", "tokens", "model_name", "resid_post"}."""
+    from safetensors import safe_open
+    with safe_open(path, framework="pt") as f:
+        metadata = f.metadata()
+        resid_post = f.get_tensor("resid_post")
+    return {
+        "prompt": metadata["prompt"],
+        "tokens": json.loads(metadata["tokens"]),
+        "model_name": metadata.get("model_name", ""),
+        "resid_post": resid_post
+    }